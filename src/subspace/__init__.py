@@ -6,8 +6,13 @@ __version__ = "0.1.0"
 DEBUG = False
 
 
-def debug(*args, **kwargs) -> None:
-    """Print debug message if DEBUG is enabled."""
+def debug(msg: str, *args: object) -> None:
+    """Print debug message if DEBUG is enabled.
+
+    When args are given, msg is a %-format string, e.g.
+    debug("Found %s", path), formatted only when DEBUG is on, so hot paths
+    can pass values rather than build f-strings that are never printed.
+    """
     if DEBUG:
         import sys
-        print("[DEBUG]", *args, file=sys.stderr, **kwargs)
+        print("[DEBUG]", msg % args if args else msg, file=sys.stderr)
@@ -3,190 +3,121 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import functools
+import os
 import shutil
 import sys
+from operator import attrgetter
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
 from subspace import __version__, debug
 
+if TYPE_CHECKING:
+    from subspace.core.commands import CommandSource
+    from subspace.core.discovery import AgentSource
 
-CODEX_INTEGRATION_MARKER = "## Subspace Agent Tools"
-CODEX_INTEGRATION_CONTENT = '''
-## Subspace Agent Tools
-
-You have access to the Subspace CLI (`subspace`) which provides two powerful capabilities:
-1. **Subagents** - Run specialized agents in isolated sessions
-2. **Slash Commands** - Execute predefined prompts/workflows programmatically
-
----
-
-## Subspace Subagent System
-
-Subagents run in isolated Codex sessions with their own context, preventing context window bloat.
-
-### Recognizing Subagent Requests
-
-When users reference `@agent-{name}` or `@{name}` (where @{name} doesn't include a file path) in their input, they want you to dispatch that subagent:
-
-- `@agent-tdd-agent` → Run tdd-agent subagent
-- `@agent-coder` → Run coder subagent
-- `@web-search-researcher` → Run web-search-researcher subagent
-- `@test-lead` -> Run test-lead subagent
-
-### Subagent Commands
-
-```bash
-# List all available subagents
-subspace subagent list
-
-# Show details about a specific agent
-subspace subagent show <agent-name>
-
-# Run a single subagent with a task
-subspace subagent run <agent-name> "<task description>"
-
-# Run multiple subagents in parallel
-subspace subagent parallel <agent>:"<task>" [<agent>:"<task>" ...]
-```
-
-### When to Use Subagents
-
-Use subagents when:
-- User explicitly requests one with `@agent-{name}` syntax
-- Task benefits from specialized expertise (TDD, research, code review)
-- You want to isolate complex work from the main context
-- Running parallel independent tasks
-
-### Subagent Example Usage
-
-```bash
-# User says: "Use @agent-tdd-agent to write tests for the auth module"
-subspace subagent run tdd-agent "Write comprehensive tests for the auth module"
-
-# User says: "Have @agent-coder implement this and @agent-tdd-agent write tests"
-subspace subagent parallel coder:"Implement the user profile feature" tdd-agent:"Write tests for user profile"
-```
-
----
-
-## Subspace Slash Command System
-
-Slash commands are predefined prompts stored as markdown files that you can retrieve and execute programmatically. Unlike standard prompts or slash commands which run at the beginning of an exchange and immediately expand to the prompt text, the Subspace Slash Command system allows you to run slash commands programatically.
-
-This enables:
-
-- **Nested workflows**: Meta-prompts that reference other commands
-- **Reusable procedures**: Standard operating procedures as executable prompts
-- **Dynamic pipelines**: Users can chain commands like "run /quick_tasks then /execute_sync then /validate then /create_PR"
-
-### Recognizing Slash Command Requests
-
-When users reference `/{command-name}` in their task, they want you to execute that command:
-
-- `/quick_tasks` → Retrieve and execute the quick_tasks prompt
-- `/execute_sync` → Retrieve and execute the execute_sync prompt
-- `/validate` → Retrieve and execute the validate prompt
-
-Slash commands can be namespaced as well, typically when users nest commands in directories. 
-
-- `/test:update_unit_tests`
-- `/flow:workflow_v4`
 
-Consider these namespaces part of the command name.
+CODEX_INTEGRATION_MARKER = "## Subspace Agent Tools"
 
-### Slash Command CLI
+# Row formats for the `list` tables, and the entry attributes that fill them
+AGENT_ROW_FORMAT = "%-20s %-45s %s"
+AGENT_ROW_FIELDS = attrgetter("name", "path", "source_type")
+COMMAND_ROW_FORMAT = "%-25s %-20s %s"
+COMMAND_ROW_FIELDS = attrgetter("name", "source_type", "description")
+TABLE_RULE = "-" * 80
 
-```bash
-# Get the full prompt text for a command (primary use case)
-subspace command get /command-name [arg1] [arg2] ...
+# Number of body lines shown by `show`
+PREVIEW_LINES = 50
 
-# List all available commands
-subspace command list
+# Text printed by --version (argparse expands %(prog)s)
+VERSION_TEMPLATE = f"%(prog)s {__version__}"
 
-# Show command details and metadata
-subspace command show /command-name
-```
 
-### How to Execute Slash Commands
+def _resolve_agent_sources(args: argparse.Namespace) -> list[AgentSource]:
+    """Return agent sources, honoring the --agents-dir override."""
+    from subspace.core.discovery import AgentSource, get_agent_sources
 
-When a user asks you to run slash commands, follow this workflow:
+    agents_dir = getattr(args, "agents_dir", None)
+    if agents_dir:
+        return [AgentSource("override", Path(agents_dir).expanduser(), "override", 0)]
+    return get_agent_sources()
 
-1. **Retrieve the prompt**: Use `subspace command get /command-name` to get the full prompt text
-2. **Execute the instructions literally**: The prompt text contains direct instructions—execute them exactly as written. Do NOT summarize, paraphrase, or just acknowledge the command. If the prompt says "output X", you must output X. If it says "create file Y", create that file. Treat each prompt as a user directive you must fulfill, not a task to describe.
-3. **Handle nested commands**: If the prompt references other `/commands`, retrieve and execute those too
-4. **Continue the pipeline**: Move to the next command when done
 
-**IMPORTANT**: Slash command prompts are instructions, not descriptions. Execute them fully before moving on.
+def _resolve_command_sources(args: argparse.Namespace) -> list[CommandSource]:
+    """Return command sources, honoring the --commands-dir override."""
+    from subspace.core.commands import CommandSource, get_command_sources
 
-### Slash Command Example Usage
+    commands_dir = getattr(args, "commands_dir", None)
+    if commands_dir:
+        return [CommandSource("override", Path(commands_dir).expanduser(), "override", 0)]
+    return get_command_sources()
 
-```bash
-# User says: "run /quick_tasks and then /execute_sync. When done, run /validate"
 
-# Step 1: Get and execute the first command
-subspace command get /quick_tasks
-# (Follow the returned prompt instructions)
+def _head_lines(text: str, n: int) -> tuple[str, int]:
+    """Return the first n lines of text and how many lines follow them.
 
-# Step 2: Get and execute the second command
-subspace command get /execute_sync
-# (Follow the returned prompt instructions - may contain nested /commands)
+    Walks newlines with str.find instead of splitting the whole text, so
+    only the preview is materialized no matter how long the body is.
+    """
+    idx = -1
+    for _ in range(n):
+        idx = text.find("\n", idx + 1)
+        if idx == -1:
+            return text, 0
+    return text[:idx], text.count("\n", idx + 1) + 1
 
-# Step 3: Get and execute the final command
-subspace command get /validate
-# (Follow the returned prompt instructions)
-```
 
-### Command Arguments
+def _print_json(data: object) -> None:
+    """Print data as indented JSON for --output json.
 
-Commands can accept positional arguments. Use `$1`, `$2`, etc. in your command files:
+    json is imported here rather than at module level since most
+    invocations use text output and never need it.
+    """
+    import json
+    print(json.dumps(data, indent=2))
 
-```bash
-# If /deploy command contains: "Deploy $1 to $2 environment"
-subspace command get /deploy backend production
-# Returns: "Deploy backend to production environment"
-```
 
-### Nested Commands (Meta-Prompts)
+@functools.lru_cache(maxsize=1)
+def _which(name: str, path: str) -> str | None:
+    """shutil.which() memoized on the PATH it searched, so a PATH change invalidates it."""
+    return shutil.which(name, path=path)
 
-A command prompt can reference other commands. When you see `/other-command` in a prompt:
-1. First complete any instructions before the nested command reference
-2. Retrieve the nested command with `subspace command get /other-command`
-3. Execute those instructions
-4. Continue with any remaining instructions from the parent prompt
 
-### Command Discovery
+def _find_codex() -> str | None:
+    """Locate the codex binary on PATH (cached per distinct PATH value)."""
+    return _which("codex", os.environ.get("PATH", os.defpath))
 
-Commands are discovered from (in priority order):
-1. Project-level `./.claude/commands/`
-2. Project-level `./.codex/prompts/`
-3. User-level `~/.claude/commands/`
-4. User-level `~/.codex/prompts/`
 
----
+def _file_contains(f: BinaryIO, needle: str) -> bool:
+    """Return True if the open binary file contains needle.
 
-## Output Handling
+    Memory-maps the file and searches it with mmap.find, so the OS pages in
+    only what the search touches and nothing is copied into a Python str.
+    """
+    encoded = needle.encode("utf-8")
 
-- **Text mode** (default): Returns human-readable output
-- **JSON mode** (`--output json`): Returns structured JSON for programmatic use
-- **JSONL mode** (`--output jsonl`): Streams events for UI integration (subagent only)
+    # Too short to hold the needle (this also covers empty files, which
+    # mmap cannot map)
+    if os.fstat(f.fileno()).st_size < max(len(encoded), 1):
+        return False
 
-## Important Notes
+    import mmap
 
-- Subagents run in `workspace-write` sandbox mode for security
-- Each subagent has fresh context (no access to this conversation)
-- Provide complete, self-contained task descriptions
-- Review subagent output before integrating changes
-- Slash commands return prompt text that YOU execute - they don't run automatically
-'''
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(encoded) != -1
 
 
 def cmd_setup(args: argparse.Namespace) -> int:
     """Set up Codex CLI integration for subspace subagents."""
-    codex_dir = Path.home() / ".codex"
-    agents_file = codex_dir / "AGENTS.md"
+    # Plain strings: nothing here needs Path, and HOME is read per call so
+    # tests (and callers) can redirect it
+    codex_dir = os.path.join(os.path.expanduser("~"), ".codex")
+    agents_file = os.path.join(codex_dir, "AGENTS.md")
 
-    # Check if codex CLI is available
-    codex_available = shutil.which("codex") is not None
+    # Check if codex CLI is available (--skip-check trusts that it is)
+    codex_available = args.skip_check or _find_codex() is not None
 
     if not codex_available:
         print("Warning: 'codex' CLI not found in PATH", file=sys.stderr)
@@ -194,20 +125,21 @@ def cmd_setup(args: argparse.Namespace) -> int:
         print()
 
     # Create ~/.codex if it doesn't exist
-    codex_dir.mkdir(parents=True, exist_ok=True)
+    os.makedirs(codex_dir, exist_ok=True)
 
-    # Check if already installed
-    if agents_file.exists():
-        content = agents_file.read_text()
-        if CODEX_INTEGRATION_MARKER in content:
+    # Open once: "a+" creates the file if missing, lets us scan for an existing
+    # install, and always appends at the end.
+    with open(agents_file, "a+b") as f:
+        if _file_contains(f, CODEX_INTEGRATION_MARKER):
             print(f"✓ Subspace integration already installed in {agents_file}")
             print()
             print("To reinstall, first remove the '## Subspace Subagent System' section.")
             return 0
 
-    # Append subspace instructions
-    with agents_file.open("a") as f:
-        f.write(CODEX_INTEGRATION_CONTENT)
+        # Append subspace instructions (shipped as package data, only read here)
+        from importlib.resources import files
+        content = files("subspace").joinpath("data/codex_integration.md").read_text(encoding="utf-8")
+        f.write(("\n" + content).encode("utf-8"))
 
     print(f"✓ Subspace integration installed to {agents_file}")
     print()
@@ -227,7 +159,7 @@ def cmd_setup(args: argparse.Namespace) -> int:
 
 def cmd_run(args: argparse.Namespace) -> int:
     """Run a single subagent, or vanilla Codex if no agent specified."""
-    from subspace.core.discovery import find_agent, get_agent_sources
+    from subspace.core.discovery import find_agent
     from subspace.core.runner import run_agent, run_vanilla, validate_agent_name
 
     # Parse positional args: either [task] or [agent, task]
@@ -261,13 +193,7 @@ def cmd_run(args: argparse.Namespace) -> int:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
-    # Get agent sources (respects --agents-dir override)
-    if args.agents_dir:
-        from subspace.core.discovery import AgentSource
-        from pathlib import Path
-        sources = [AgentSource("override", Path(args.agents_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_agent_sources()
+    sources = _resolve_agent_sources(args)
 
     result = find_agent(agent_name, sources)
     if not result:
@@ -275,7 +201,7 @@ def cmd_run(args: argparse.Namespace) -> int:
         return 1
 
     agent_path, source = result
-    debug(f"Found agent: {agent_path} from {source.name}")
+    debug("Found agent: %s from %s", agent_path, source.name)
 
     return run_agent(
         agent_path=agent_path,
@@ -288,16 +214,9 @@ def cmd_run(args: argparse.Namespace) -> int:
 
 def cmd_parallel(args: argparse.Namespace) -> int:
     """Run multiple subagents in parallel."""
-    from subspace.core.discovery import find_agent, get_agent_sources
     from subspace.core.runner import run_parallel
 
-    # Get agent sources (respects --agents-dir override)
-    if args.agents_dir:
-        from subspace.core.discovery import AgentSource
-        from pathlib import Path
-        sources = [AgentSource("override", Path(args.agents_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_agent_sources()
+    sources = _resolve_agent_sources(args)
 
     return run_parallel(
         pairs=args.pairs,
@@ -305,20 +224,15 @@ def cmd_parallel(args: argparse.Namespace) -> int:
         output_format=args.output,
         timeout=args.timeout,
         enable_debug=args.debug,
+        max_parallel=args.max_parallel,
     )
 
 
 def cmd_list(args: argparse.Namespace) -> int:
     """List available subagents."""
-    from subspace.core.discovery import get_agent_sources, list_all_agents
+    from subspace.core.discovery import list_all_agents
 
-    # Get agent sources (respects --agents-dir override)
-    if args.agents_dir:
-        from subspace.core.discovery import AgentSource
-        from pathlib import Path
-        sources = [AgentSource("override", Path(args.agents_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_agent_sources()
+    sources = _resolve_agent_sources(args)
 
     agents = list_all_agents(sources)
 
@@ -327,24 +241,22 @@ def cmd_list(args: argparse.Namespace) -> int:
         return 1
 
     if args.output == "json":
-        import json
-        print(json.dumps(agents, indent=2))
+        _print_json([agent.to_dict() for agent in agents])
     else:
-        # Table format: NAME, SOURCE, TYPE
-        print(f"{'NAME':<20} {'SOURCE':<45} {'TYPE'}")
-        print("-" * 80)
-        for agent in agents:
-            path_display = agent["path"]
+        # Table format: NAME, SOURCE, TYPE (built up and written once)
+        rows = [AGENT_ROW_FORMAT % ("NAME", "SOURCE", "TYPE"), TABLE_RULE]
+        for name, path_display, source_type in map(AGENT_ROW_FIELDS, agents):
             if len(path_display) > 42:
                 path_display = "..." + path_display[-39:]
-            print(f"{agent['name']:<20} {path_display:<45} {agent['source_type']}")
+            rows.append(AGENT_ROW_FORMAT % (name, path_display, source_type))
+        sys.stdout.write("\n".join(rows) + "\n")
 
     return 0
 
 
 def cmd_show(args: argparse.Namespace) -> int:
     """Show details of a specific subagent."""
-    from subspace.core.discovery import find_agent, get_agent_sources, load_agent_details
+    from subspace.core.discovery import find_agent, load_agent_details
     from subspace.core.runner import validate_agent_name
 
     # Security: Validate agent name to prevent path traversal
@@ -354,13 +266,7 @@ def cmd_show(args: argparse.Namespace) -> int:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
-    # Get agent sources (respects --agents-dir override)
-    if args.agents_dir:
-        from subspace.core.discovery import AgentSource
-        from pathlib import Path
-        sources = [AgentSource("override", Path(args.agents_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_agent_sources()
+    sources = _resolve_agent_sources(args)
 
     result = find_agent(args.agent, sources)
     if not result:
@@ -371,8 +277,7 @@ def cmd_show(args: argparse.Namespace) -> int:
     details = load_agent_details(agent_path, source)
 
     if args.output == "json":
-        import json
-        print(json.dumps(details, indent=2))
+        _print_json(details)
     else:
         print(f"Agent: {details['name']}")
         print(f"Source: {details['source']} ({details['source_type']})")
@@ -386,11 +291,10 @@ def cmd_show(args: argparse.Namespace) -> int:
         print("Instructions:")
         print("-" * 40)
         # Show first 50 lines
-        lines = details.get("body", "").strip().split("\n")
-        preview = "\n".join(lines[:50])
+        preview, remaining = _head_lines(details.get("body", "").strip(), PREVIEW_LINES)
         print(preview)
-        if len(lines) > 50:
-            print(f"\n... ({len(lines) - 50} more lines)")
+        if remaining:
+            print(f"\n... ({remaining} more lines)")
 
     return 0
 
@@ -406,9 +310,7 @@ def cmd_command_get(args: argparse.Namespace) -> int:
     This is the primary interface for agents to retrieve executable prompts.
     """
     from subspace.core.commands import (
-        CommandSource,
         find_command,
-        get_command_sources,
         interpolate_arguments,
         load_command_prompt,
         validate_command_name,
@@ -424,11 +326,7 @@ def cmd_command_get(args: argparse.Namespace) -> int:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
-    # Get command sources (respects --commands-dir override)
-    if args.commands_dir:
-        sources = [CommandSource("override", Path(args.commands_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_command_sources()
+    sources = _resolve_command_sources(args)
 
     result = find_command(command_name, sources)
     if not result:
@@ -436,7 +334,7 @@ def cmd_command_get(args: argparse.Namespace) -> int:
         return 1
 
     command_path, source = result
-    debug(f"Found command: {command_path} from {source.name}")
+    debug("Found command: %s from %s", command_path, source.name)
 
     # Load and optionally interpolate the prompt
     prompt = load_command_prompt(command_path)
@@ -445,14 +343,13 @@ def cmd_command_get(args: argparse.Namespace) -> int:
         prompt = interpolate_arguments(prompt, command_args)
 
     if args.output == "json":
-        import json
-        print(json.dumps({
+        _print_json({
             "command": f"/{clean_name}",
             "path": str(command_path),
             "source": source.name,
             "args": command_args,
             "prompt": prompt,
-        }, indent=2))
+        })
     else:
         # Raw prompt output - ready for agent execution
         print(prompt)
@@ -462,13 +359,9 @@ def cmd_command_get(args: argparse.Namespace) -> int:
 
 def cmd_command_list(args: argparse.Namespace) -> int:
     """List available slash commands."""
-    from subspace.core.commands import CommandSource, get_command_sources, list_all_commands
+    from subspace.core.commands import list_all_commands
 
-    # Get command sources (respects --commands-dir override)
-    if args.commands_dir:
-        sources = [CommandSource("override", Path(args.commands_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_command_sources()
+    sources = _resolve_command_sources(args)
 
     commands = list_all_commands(sources)
 
@@ -482,17 +375,15 @@ def cmd_command_list(args: argparse.Namespace) -> int:
         return 1
 
     if args.output == "json":
-        import json
-        print(json.dumps(commands, indent=2))
+        _print_json([command.to_dict() for command in commands])
     else:
-        # Table format: NAME, SOURCE, DESCRIPTION
-        print(f"{'COMMAND':<25} {'SOURCE':<20} {'DESCRIPTION'}")
-        print("-" * 80)
-        for cmd in commands:
-            desc = cmd.get("description", "")
+        # Table format: COMMAND, SOURCE, DESCRIPTION (built up and written once)
+        rows = [COMMAND_ROW_FORMAT % ("COMMAND", "SOURCE", "DESCRIPTION"), TABLE_RULE]
+        for name, source_type, desc in map(COMMAND_ROW_FIELDS, commands):
             if len(desc) > 30:
                 desc = desc[:27] + "..."
-            print(f"{cmd['name']:<25} {cmd['source_type']:<20} {desc}")
+            rows.append(COMMAND_ROW_FORMAT % (name, source_type, desc))
+        sys.stdout.write("\n".join(rows) + "\n")
 
     return 0
 
@@ -500,9 +391,7 @@ def cmd_command_list(args: argparse.Namespace) -> int:
 def cmd_command_show(args: argparse.Namespace) -> int:
     """Show details of a specific slash command."""
     from subspace.core.commands import (
-        CommandSource,
         find_command,
-        get_command_sources,
         load_command_details,
         validate_command_name,
     )
@@ -516,11 +405,7 @@ def cmd_command_show(args: argparse.Namespace) -> int:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
-    # Get command sources (respects --commands-dir override)
-    if args.commands_dir:
-        sources = [CommandSource("override", Path(args.commands_dir).expanduser(), "override", 0)]
-    else:
-        sources = get_command_sources()
+    sources = _resolve_command_sources(args)
 
     result = find_command(command_name, sources)
     if not result:
@@ -531,8 +416,7 @@ def cmd_command_show(args: argparse.Namespace) -> int:
     details = load_command_details(command_path, source)
 
     if args.output == "json":
-        import json
-        print(json.dumps(details, indent=2))
+        _print_json(details)
     else:
         print(f"Command: {details['name']}")
         print(f"Source: {details['source']} ({details['source_type']})")
@@ -546,54 +430,145 @@ def cmd_command_show(args: argparse.Namespace) -> int:
         print("Prompt:")
         print("-" * 40)
         # Show first 50 lines
-        lines = details.get("body", "").strip().split("\n")
-        preview = "\n".join(lines[:50])
+        preview, remaining = _head_lines(details.get("body", "").strip(), PREVIEW_LINES)
         print(preview)
-        if len(lines) > 50:
-            print(f"\n... ({len(lines) - 50} more lines)")
+        if remaining:
+            print(f"\n... ({remaining} more lines)")
 
     return 0
 
 
-def main() -> int:
-    """Main entry point for subspace CLI."""
-    parser = argparse.ArgumentParser(
-        prog="subspace",
-        description="Subspace CLI tools",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
+# =============================================================================
+# Parser Construction
+# =============================================================================
+#
+# Each subcommand's parser is built by its own function so that main() only
+# has to construct the parsers for the command actually being invoked.
+
+
+@contextlib.contextmanager
+def _untranslated_argparse():
+    """Temporarily bypass gettext lookups inside argparse.
+
+    argparse routes every built-in string through gettext, and each lookup
+    searches the locale directories. Subspace's help text is English-only, so
+    identity functions give the same output. The originals are restored on
+    exit so other argparse users in the process are unaffected.
+    """
+    saved = argparse._, argparse.ngettext
+    argparse._ = lambda message: message
+    argparse.ngettext = lambda singular, plural, n: singular if n == 1 else plural
+    try:
+        yield
+    finally:
+        argparse._, argparse.ngettext = saved
+
+
+# Options shared by several subcommands are declared once on add_help=False
+# parent parsers and attached via parents=[...]. Each is built at most once.
+
+
+@functools.lru_cache(maxsize=None)
+def _debug_option() -> argparse.ArgumentParser:
+    """--debug"""
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug output",
     )
-    parser.add_argument(
-        "--version",
-        action="version",
-        version=f"%(prog)s {__version__}",
+    return parent
+
+
+@functools.lru_cache(maxsize=None)
+def _agents_dir_option() -> argparse.ArgumentParser:
+    """--agents-dir"""
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
+        "--agents-dir",
+        help="Override: use single directory instead of discovery",
     )
+    return parent
 
-    subparsers = parser.add_subparsers(dest="command", required=True)
 
-    # subspace setup
+@functools.lru_cache(maxsize=None)
+def _json_output_option() -> argparse.ArgumentParser:
+    """--output {text,json}"""
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
+        "--output",
+        choices=["text", "json"],
+        default="text",
+        help="Output format",
+    )
+    return parent
+
+
+@functools.lru_cache(maxsize=None)
+def _exec_options() -> argparse.ArgumentParser:
+    """Options for subcommands that execute agents (run, parallel)."""
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
+        "--output",
+        choices=["text", "jsonl"],
+        default="text",
+        help="Output format (jsonl for UI streaming)",
+    )
+    parent.add_argument(
+        "--timeout",
+        type=int,
+        default=600,
+        help="Timeout in seconds (default: 600)",
+    )
+    return parent
+
+
+@functools.lru_cache(maxsize=None)
+def _command_options() -> argparse.ArgumentParser:
+    """Options shared by the slash command subcommands."""
+    parent = argparse.ArgumentParser(add_help=False, parents=[_debug_option()])
+    parent.add_argument(
+        "--commands-dir",
+        help="Override: use single directory instead of discovery",
+    )
+    return parent
+
+
+def _add_setup_parser(subparsers: argparse._SubParsersAction) -> None:
+    """subspace setup"""
     setup_parser = subparsers.add_parser(
         "setup",
         help="Set up Codex CLI integration",
         description="Install Subspace integration into ~/.codex/AGENTS.md for Codex CLI",
     )
+    setup_parser.add_argument(
+        "--skip-check",
+        action="store_true",
+        help="Skip checking PATH for the codex CLI (e.g. in CI or image builds)",
+    )
     setup_parser.set_defaults(func=cmd_setup)
 
-    # subspace subagent ...
+
+def _add_subagent_parser(subparsers: argparse._SubParsersAction) -> argparse._SubParsersAction:
+    """subspace subagent ..."""
     subagent_parser = subparsers.add_parser(
         "subagent",
         help="Run Codex subagents",
         description="Run specialized Codex subagents using Claude Code agent definitions",
     )
-    subagent_sub = subagent_parser.add_subparsers(
+    return subagent_parser.add_subparsers(
         dest="subagent_command",
         required=True,
     )
 
-    # subspace subagent run [agent] <task>
+
+def _add_run_parser(subagent_sub: argparse._SubParsersAction) -> None:
+    """subspace subagent run [agent] <task>"""
     run_parser = subagent_sub.add_parser(
         "run",
         help="Run a single agent",
         description="Run a Codex subagent with a task. If agent is omitted, runs vanilla Codex.",
+        parents=[_exec_options(), _debug_option(), _agents_dir_option()],
     )
     run_parser.add_argument(
         "args",
@@ -601,34 +576,16 @@ def main() -> int:
         metavar="[agent] task",
         help="Agent name and task, or just task for vanilla Codex",
     )
-    run_parser.add_argument(
-        "--output",
-        choices=["text", "jsonl"],
-        default="text",
-        help="Output format (jsonl for UI streaming)",
-    )
-    run_parser.add_argument(
-        "--timeout",
-        type=int,
-        default=600,
-        help="Timeout in seconds (default: 600)",
-    )
-    run_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug output",
-    )
-    run_parser.add_argument(
-        "--agents-dir",
-        help="Override: use single directory instead of discovery",
-    )
     run_parser.set_defaults(func=cmd_run)
 
-    # subspace subagent parallel <agent:task>...
+
+def _add_parallel_parser(subagent_sub: argparse._SubParsersAction) -> None:
+    """subspace subagent parallel <agent:task>..."""
     parallel_parser = subagent_sub.add_parser(
         "parallel",
         help="Run multiple agents in parallel",
         description='Run multiple agents concurrently (e.g., tdd-agent:"task1" coder:"task2")',
+        parents=[_exec_options(), _debug_option(), _agents_dir_option()],
     )
     parallel_parser.add_argument(
         "pairs",
@@ -636,83 +593,66 @@ def main() -> int:
         help='agent:task pairs (e.g., tdd-agent:"write tests")',
     )
     parallel_parser.add_argument(
-        "--output",
-        choices=["text", "jsonl"],
-        default="text",
-        help="Output format (jsonl for UI streaming)",
-    )
-    parallel_parser.add_argument(
-        "--timeout",
+        "--max-parallel",
         type=int,
-        default=600,
-        help="Timeout in seconds (default: 600)",
-    )
-    parallel_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug output",
-    )
-    parallel_parser.add_argument(
-        "--agents-dir",
-        help="Override: use single directory instead of discovery",
+        metavar="N",
+        help="Run at most N agents at once (default: CPU count, up to 8)",
     )
     parallel_parser.set_defaults(func=cmd_parallel)
 
-    # subspace subagent list
+
+def _add_list_parser(subagent_sub: argparse._SubParsersAction) -> None:
+    """subspace subagent list"""
     list_parser = subagent_sub.add_parser(
         "list",
         help="List available agents",
         description="List all discovered agents with their sources",
-    )
-    list_parser.add_argument(
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format",
-    )
-    list_parser.add_argument(
-        "--agents-dir",
-        help="Override: use single directory instead of discovery",
+        parents=[_json_output_option(), _agents_dir_option()],
     )
     list_parser.set_defaults(func=cmd_list)
 
-    # subspace subagent show <agent>
+
+def _add_show_parser(subagent_sub: argparse._SubParsersAction) -> None:
+    """subspace subagent show <agent>"""
     show_parser = subagent_sub.add_parser(
         "show",
         help="Show agent details",
         description="Show details of a specific agent",
+        parents=[_json_output_option(), _agents_dir_option()],
     )
     show_parser.add_argument("agent", help="Agent name")
-    show_parser.add_argument(
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format",
-    )
-    show_parser.add_argument(
-        "--agents-dir",
-        help="Override: use single directory instead of discovery",
-    )
     show_parser.set_defaults(func=cmd_show)
 
-    # =========================================================================
-    # subspace command ...
-    # =========================================================================
+
+def _add_command_parser(subparsers: argparse._SubParsersAction) -> argparse._SubParsersAction:
+    """subspace command ..."""
     command_parser = subparsers.add_parser(
         "command",
         help="Retrieve and manage slash commands",
         description="Retrieve slash command prompts for programmatic execution by agents",
     )
-    command_sub = command_parser.add_subparsers(
+    return command_parser.add_subparsers(
         dest="command_subcommand",
         required=True,
     )
 
-    # subspace command get /name [args...]
+
+def _add_command_get_parser(command_sub: argparse._SubParsersAction) -> None:
+    """subspace command get /name [args...]"""
+    # Parent options are added before the parser's own, so --output goes on
+    # a parent too to stay ahead of --debug/--commands-dir in help and usage
+    output_option = argparse.ArgumentParser(add_help=False)
+    output_option.add_argument(
+        "--output",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text for raw prompt)",
+    )
     cmd_get_parser = command_sub.add_parser(
         "get",
         help="Get the full prompt text for a command",
         description="Retrieve the prompt text for a slash command. This is the primary interface for agents.",
+        parents=[output_option, _command_options()],
     )
     cmd_get_parser.add_argument(
         "command",
@@ -723,78 +663,115 @@ def main() -> int:
         nargs="*",
         help="Optional arguments to interpolate ($1, $2, etc.)",
     )
-    cmd_get_parser.add_argument(
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format (default: text for raw prompt)",
-    )
-    cmd_get_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug output",
-    )
-    cmd_get_parser.add_argument(
-        "--commands-dir",
-        help="Override: use single directory instead of discovery",
-    )
     cmd_get_parser.set_defaults(func=cmd_command_get)
 
-    # subspace command list
+
+def _add_command_list_parser(command_sub: argparse._SubParsersAction) -> None:
+    """subspace command list"""
     cmd_list_parser = command_sub.add_parser(
         "list",
         help="List available commands",
         description="List all discovered slash commands with their sources",
-    )
-    cmd_list_parser.add_argument(
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format",
-    )
-    cmd_list_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug output",
-    )
-    cmd_list_parser.add_argument(
-        "--commands-dir",
-        help="Override: use single directory instead of discovery",
+        parents=[_json_output_option(), _command_options()],
     )
     cmd_list_parser.set_defaults(func=cmd_command_list)
 
-    # subspace command show /name
+
+def _add_command_show_parser(command_sub: argparse._SubParsersAction) -> None:
+    """subspace command show /name"""
     cmd_show_parser = command_sub.add_parser(
         "show",
         help="Show command details",
         description="Show details of a specific slash command including metadata",
+        parents=[_json_output_option(), _command_options()],
     )
     cmd_show_parser.add_argument(
         "command",
         help="Command name (e.g., /quick_tasks or quick_tasks)",
     )
-    cmd_show_parser.add_argument(
-        "--output",
-        choices=["text", "json"],
-        default="text",
-        help="Output format",
-    )
-    cmd_show_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug output",
+    cmd_show_parser.set_defaults(func=cmd_command_show)
+
+
+# Top-level commands, in the order they appear in --help. Group builders
+# return the nested subparsers action (or None for leaf commands).
+GROUP_BUILDERS = {
+    "setup": _add_setup_parser,
+    "subagent": _add_subagent_parser,
+    "command": _add_command_parser,
+}
+
+# Nested subcommands keyed on (command, subcommand)
+BUILDERS = {
+    ("subagent", "run"): _add_run_parser,
+    ("subagent", "parallel"): _add_parallel_parser,
+    ("subagent", "list"): _add_list_parser,
+    ("subagent", "show"): _add_show_parser,
+    ("command", "get"): _add_command_get_parser,
+    ("command", "list"): _add_command_list_parser,
+    ("command", "show"): _add_command_show_parser,
+}
+
+
+def build_parser(argv: list[str]) -> argparse.ArgumentParser:
+    """Build the argument parser, constructing only the subparsers argv needs.
+
+    Peeks at argv[0:2] to find the command and subcommand. When either is
+    missing or unknown (e.g. top-level -h, typos), every parser at that level
+    is built so help output and error messages list all choices.
+    """
+    parser = argparse.ArgumentParser(
+        prog="subspace",
+        description="Subspace CLI tools",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    cmd_show_parser.add_argument(
-        "--commands-dir",
-        help="Override: use single directory instead of discovery",
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=VERSION_TEMPLATE,
     )
-    cmd_show_parser.set_defaults(func=cmd_command_show)
 
-    # Parse and execute
-    args = parser.parse_args()
+    # Commands without --debug (setup, list/show) still get args.debug
+    parser.set_defaults(debug=False)
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    command = argv[0] if argv else None
+    subcommand = argv[1] if len(argv) > 1 else None
+
+    for group, build_group in GROUP_BUILDERS.items():
+        if command in GROUP_BUILDERS and group != command:
+            continue
+        group_sub = build_group(subparsers)
+        if group_sub is None:
+            continue
+        for (parent, name), build in BUILDERS.items():
+            if parent != group:
+                continue
+            if (group, subcommand) in BUILDERS and name != subcommand:
+                continue
+            build(group_sub)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Main entry point for subspace CLI."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Answer a bare --version without building any parsers
+    if argv == ["--version"]:
+        print(f"subspace {__version__}")
+        return 0
+
+    with _untranslated_argparse():
+        parser = build_parser(argv)
+
+        # Parse and execute
+        args = parser.parse_args(argv)
 
     # Enable debug mode globally if requested
-    if hasattr(args, "debug") and args.debug:
+    if args.debug:
         import subspace
         subspace.DEBUG = True
         debug(f"subspace v{__version__}")
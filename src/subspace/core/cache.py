@@ -0,0 +1,42 @@
+"""Time-limited memoization shared by command and agent discovery."""
+
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def ttl_cache(seconds: float, maxsize: int = 32) -> Callable[[Callable], Callable]:
+    """Memoize a function of hashable positional args for `seconds`.
+
+    Each entry records when it was computed and is recomputed once it is
+    `seconds` old, so every result is reused for the same span regardless of
+    when the call happens. Past maxsize the oldest entry is dropped. Like
+    functools.lru_cache, the wrapper has a cache_clear() method.
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: dict[tuple, tuple[float, Any]] = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            entry = entries.get(args)
+            if entry is not None and now - entry[0] < seconds:
+                return entry[1]
+
+            value = func(*args)
+            with lock:
+                entries.pop(args, None)
+                entries[args] = (now, value)
+                if len(entries) > maxsize:
+                    del entries[next(iter(entries))]
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
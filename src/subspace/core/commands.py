@@ -6,15 +6,29 @@ They can contain prompts that agents execute programmatically.
 
 from __future__ import annotations
 
+import functools
 import json
+import os
 import re
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
 from subspace import debug
-
-
-@dataclass
+from subspace.core.cache import ttl_cache
+# Frontmatter helpers are re-exported for existing importers of this module
+from subspace.core.frontmatter import (
+    FRONTMATTER_PATTERN,
+    FRONTMATTER_READ_SIZE,
+    load_markdown,
+    parse_frontmatter,
+    read_frontmatter,
+    split_frontmatter,
+    strip_frontmatter,
+)
+
+
+@dataclass(slots=True, frozen=True)
 class CommandSource:
     """Represents a source for slash command definitions."""
 
@@ -24,11 +38,50 @@ class CommandSource:
     priority: int       # Lower = higher priority
 
 
+@dataclass(slots=True)
+class CommandEntry:
+    """A command found by list_all_commands()."""
+
+    name: str           # e.g., "/deploy", "/subspace:sweep"
+    path: str
+    source: str
+    source_type: str
+    description: str
+    namespace: str | None = None
+
+    def to_dict(self) -> dict:
+        """Return the JSON form; namespace is only present when set."""
+        data = {
+            "name": self.name,
+            "path": self.path,
+            "source": self.source,
+            "source_type": self.source_type,
+        }
+        if self.namespace is not None:
+            data["namespace"] = self.namespace
+        data["description"] = self.description
+        return data
+
+
+# How long (seconds) a source directory probe is reused before re-checking
+SOURCE_CACHE_TTL = 1.0
+
+
 # Valid command name pattern: alphanumeric, hyphen, underscore
 # Supports namespaced commands with colon separator (e.g., subspace:sweep)
 # Commands can optionally start with /
-COMMAND_NAME_PATTERN = re.compile(r"^/?[a-zA-Z0-9_-]+$")
-NAMESPACED_COMMAND_PATTERN = re.compile(r"^/?([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)$")
+# All command name patterns are applied with fullmatch
+COMMAND_NAME_PATTERN = re.compile(r"/?[a-zA-Z0-9_-]+")
+NAMESPACED_COMMAND_PATTERN = re.compile(r"/?([a-zA-Z0-9_-]+):([a-zA-Z0-9_-]+)")
+
+# Every valid name (after removing one leading "/") in one pattern: one or
+# two colon-separated parts that don't start with a hyphen
+VALID_COMMAND_PATTERN = re.compile(
+    r"[a-zA-Z0-9_][a-zA-Z0-9_-]*(?::[a-zA-Z0-9_][a-zA-Z0-9_-]*)?"
+)
+
+# Argument placeholders: $@ (all arguments) or $N (1-based positional)
+ARGUMENT_PATTERN = re.compile(r"\$(@|\d+)")
 
 
 def validate_command_name(name: str) -> str:
@@ -39,36 +92,42 @@ def validate_command_name(name: str) -> str:
 
     Supports both simple names (e.g., "deploy") and namespaced names (e.g., "subspace:sweep").
     """
+    # Valid names need a single match; only rejected names pay for the
+    # step-by-step checks that pick the error message
+    clean_name = name[1:] if name.startswith("/") else name
+    if VALID_COMMAND_PATTERN.fullmatch(clean_name):
+        return clean_name
+
+    raise ValueError(_invalid_command_name_reason(name))
+
+
+def _invalid_command_name_reason(name: str) -> str:
+    """Explain why name was rejected by VALID_COMMAND_PATTERN."""
     if not name:
-        raise ValueError("Command name cannot be empty")
+        return "Command name cannot be empty"
 
     # Normalize: strip leading /
     clean_name = name.lstrip("/")
 
     if not clean_name:
-        raise ValueError("Command name cannot be just '/'")
+        return "Command name cannot be just '/'"
 
     # Check for namespaced command (namespace:command)
     if ":" in clean_name:
-        if not NAMESPACED_COMMAND_PATTERN.match(name):
-            raise ValueError(
+        if not NAMESPACED_COMMAND_PATTERN.fullmatch(name):
+            return (
                 f"Invalid namespaced command '{name}': must be in format 'namespace:command' "
                 "with only alphanumeric, hyphen, or underscore characters"
             )
     else:
-        if not COMMAND_NAME_PATTERN.match(name):
-            raise ValueError(
+        if not COMMAND_NAME_PATTERN.fullmatch(name):
+            return (
                 f"Invalid command name '{name}': must contain only alphanumeric, "
                 "hyphen, or underscore characters (optional leading /)"
             )
 
-    # Check for leading hyphen in any part
-    parts = clean_name.split(":")
-    for part in parts:
-        if part.startswith("-"):
-            raise ValueError(f"Invalid command name '{name}': parts cannot start with hyphen")
-
-    return clean_name
+    # Otherwise a part starts with a hyphen
+    return f"Invalid command name '{name}': parts cannot start with hyphen"
 
 
 def get_project_root() -> Path:
@@ -77,37 +136,60 @@ def get_project_root() -> Path:
 
 
 def get_command_sources(project_root: Path | None = None) -> list[CommandSource]:
-    """Return all command sources in priority order, filtered to existing paths."""
+    """Return all command sources in priority order, filtered to existing paths.
+
+    find_command() and list_all_commands() rely on this order rather than
+    re-sorting.
+
+    The directory probes are memoized per (project_root, home directory) for
+    SOURCE_CACHE_TTL seconds after each probe, so repeated calls in one
+    process don't re-stat the same paths while directories created later are
+    still picked up. invalidate_source_cache() makes them visible at once.
+    """
     if project_root is None:
         project_root = get_project_root()
 
+    sources = _scan_command_sources(project_root, Path.home())
+    for source in sources:
+        debug("Found %s commands: %s", source.name, source.path)
+    return list(sources)
+
+
+def invalidate_source_cache() -> None:
+    """Forget memoized source probes and command indexes, e.g. after adding files."""
+    _scan_command_sources.cache_clear()
+    _command_files.cache_clear()
+
+
+@ttl_cache(SOURCE_CACHE_TTL, maxsize=4)
+def _scan_command_sources(project_root: Path, home: Path) -> tuple[CommandSource, ...]:
+    """Probe the project and user command directories.
+
+    Each result is reused for SOURCE_CACHE_TTL seconds; see get_command_sources().
+    """
     sources: list[CommandSource] = []
 
     # Priority 1: Project-level Claude Code commands
-    claude_project = project_root / ".claude" / "commands"
-    if claude_project.is_dir():
-        sources.append(CommandSource("claude_project", claude_project, "project", 1))
-        debug(f"Found project claude commands: {claude_project}")
+    claude_project = os.path.join(project_root, ".claude", "commands")
+    if os.path.isdir(claude_project):
+        sources.append(CommandSource("claude_project", Path(claude_project), "project", 1))
 
     # Priority 2: Project-level Codex prompts
-    codex_project = project_root / ".codex" / "prompts"
-    if codex_project.is_dir():
-        sources.append(CommandSource("codex_project", codex_project, "project", 2))
-        debug(f"Found project codex prompts: {codex_project}")
+    codex_project = os.path.join(project_root, ".codex", "prompts")
+    if os.path.isdir(codex_project):
+        sources.append(CommandSource("codex_project", Path(codex_project), "project", 2))
 
     # Priority 3: User-level Claude Code commands
-    claude_user = Path.home() / ".claude" / "commands"
-    if claude_user.is_dir():
-        sources.append(CommandSource("claude_user", claude_user, "user", 3))
-        debug(f"Found user claude commands: {claude_user}")
+    claude_user = os.path.join(home, ".claude", "commands")
+    if os.path.isdir(claude_user):
+        sources.append(CommandSource("claude_user", Path(claude_user), "user", 3))
 
     # Priority 4: User-level Codex prompts
-    codex_user = Path.home() / ".codex" / "prompts"
-    if codex_user.is_dir():
-        sources.append(CommandSource("codex_user", codex_user, "user", 4))
-        debug(f"Found user codex prompts: {codex_user}")
+    codex_user = os.path.join(home, ".codex", "prompts")
+    if os.path.isdir(codex_user):
+        sources.append(CommandSource("codex_user", Path(codex_user), "user", 4))
 
-    return sources
+    return tuple(sources)
 
 
 def find_command(name: str, sources: list[CommandSource]) -> tuple[Path, CommandSource] | None:
@@ -118,7 +200,8 @@ def find_command(name: str, sources: list[CommandSource]) -> tuple[Path, Command
 
     Args:
         name: Command name (with or without leading /)
-        sources: List of command sources to search
+        sources: Command sources in priority order, as returned by
+            get_command_sources()
 
     Returns:
         Tuple of (command_path, source) or None if not found.
@@ -129,104 +212,133 @@ def find_command(name: str, sources: list[CommandSource]) -> tuple[Path, Command
     except ValueError:
         return None
 
-    # Also strip .md suffix if present
-    if clean_name.endswith(".md"):
-        clean_name = clean_name[:-3]
-
-    # Check if this is a namespaced command (namespace:command)
+    # Namespaced commands (namespace:command) live in a subdirectory
     if ":" in clean_name:
         namespace, cmd_name = clean_name.split(":", 1)
-        for source in sorted(sources, key=lambda s: s.priority):
-            # Look in namespace subdirectory
-            command_path = source.path / namespace / f"{cmd_name}.md"
-            if command_path.is_file():
-                debug(f"Found command '/{clean_name}' at {command_path}")
-                return (command_path, source)
     else:
-        # Simple command - look directly in commands directory
-        for source in sorted(sources, key=lambda s: s.priority):
-            command_path = source.path / f"{clean_name}.md"
-            if command_path.is_file():
-                debug(f"Found command '/{clean_name}' at {command_path}")
-                return (command_path, source)
-
-    debug(f"Command '/{clean_name}' not found in any source")
+        namespace, cmd_name = None, clean_name
+
+    for source in sources:
+        directory = os.fspath(source.path)
+        if namespace is not None:
+            directory = os.path.join(directory, namespace)
+        command_path = _command_files(directory).get(cmd_name)
+        # The index may be up to SOURCE_CACHE_TTL old: a hit is confirmed
+        # in case the file was since removed, and a miss probes the path for
+        # files added since, or names that differ only in case on
+        # case-insensitive filesystems
+        if command_path is None or not os.path.isfile(command_path):
+            command_path = os.path.join(directory, cmd_name + ".md")
+            if not os.path.isfile(command_path):
+                continue
+        debug("Found command '/%s' at %s", clean_name, command_path)
+        return (Path(command_path), source)
+
+    debug("Command '/%s' not found in any source", clean_name)
     return None
 
 
-def list_all_commands(sources: list[CommandSource]) -> list[dict]:
+@ttl_cache(SOURCE_CACHE_TTL)
+def _command_files(directory: str) -> dict[str, str]:
+    """Map command names to file paths for the .md files in one directory.
+
+    Built with a single scandir and reused for SOURCE_CACHE_TTL seconds, so
+    repeated find_command() calls don't rescan the directory. Names match file
+    names exactly; find_command() confirms each hit with a stat and probes the
+    path on a miss. A missing directory yields an empty index.
+    """
+    try:
+        files, _ = _scan_commands_dir(directory)
+    except OSError:
+        return {}
+    return {entry.name[:-3]: entry.path for entry in files}
+
+
+def list_all_commands(sources: list[CommandSource]) -> list[CommandEntry]:
     """List all commands from all sources, first-match wins for duplicates.
 
-    Scans both top-level .md files and namespace subdirectories.
+    Scans both top-level .md files and namespace subdirectories. sources must
+    already be in priority order, as returned by get_command_sources().
+    """
+    return list(iter_all_commands(sources))
+
+
+def iter_all_commands(
+    sources: list[CommandSource],
+    name_filter: Callable[[str], bool] | None = None,
+) -> Iterator[CommandEntry]:
+    """Yield commands one at a time, in list_all_commands() order.
+
+    name_filter receives each command name without the leading / (e.g.
+    "deploy", "subspace:sweep") and is applied before the file is read, so
+    rejected commands cost no I/O. Stopping iteration early skips the
+    remaining directories entirely.
     """
     seen: set[str] = set()
-    commands: list[dict] = []
 
-    for source in sorted(sources, key=lambda s: s.priority):
+    for source in sources:
         if not source.path.is_dir():
             continue
 
-        # Scan top-level .md files (non-namespaced commands)
-        for command_file in sorted(source.path.glob("*.md")):
-            name = command_file.stem
-            if name not in seen:
-                seen.add(name)
-                frontmatter = parse_frontmatter(command_file.read_text(encoding="utf-8"))
-                commands.append({
-                    "name": f"/{name}",
-                    "path": str(command_file),
-                    "source": source.name,
-                    "source_type": source.source_type,
-                    "description": frontmatter.get("description", ""),
-                })
-
-        # Scan subdirectories for namespaced commands
-        for namespace_dir in sorted(source.path.iterdir()):
-            if not namespace_dir.is_dir():
+        # One scandir pass yields both the top-level .md files and the
+        # namespace subdirectories
+        command_files, namespace_dirs = _scan_commands_dir(source.path)
+
+        # Top-level .md files (non-namespaced commands)
+        for entry in command_files:
+            name = entry.name[:-3]
+            if name in seen or (name_filter is not None and not name_filter(name)):
                 continue
+            seen.add(name)
+            frontmatter = read_frontmatter(entry.path)
+            yield CommandEntry(
+                f"/{name}",
+                entry.path,
+                source.name,
+                source.source_type,
+                frontmatter.get("description", ""),
+            )
+
+        # Subdirectories for namespaced commands
+        for namespace_dir in namespace_dirs:
             # Skip hidden directories
             if namespace_dir.name.startswith("."):
                 continue
 
             namespace = namespace_dir.name
-            for command_file in sorted(namespace_dir.glob("*.md")):
-                cmd_name = command_file.stem
-                full_name = f"{namespace}:{cmd_name}"
-                if full_name not in seen:
-                    seen.add(full_name)
-                    frontmatter = parse_frontmatter(command_file.read_text(encoding="utf-8"))
-                    commands.append({
-                        "name": f"/{full_name}",
-                        "path": str(command_file),
-                        "source": source.name,
-                        "source_type": source.source_type,
-                        "namespace": namespace,
-                        "description": frontmatter.get("description", ""),
-                    })
-
-    return commands
-
-
-def parse_frontmatter(content: str) -> dict:
-    """Parse YAML frontmatter from markdown content."""
-    pattern = r"^---\s*\n(.*?)\n---\s*\n"
-    match = re.match(pattern, content, flags=re.DOTALL)
-    if not match:
-        return {}
-
-    frontmatter: dict[str, str] = {}
-    for line in match.group(1).split("\n"):
-        if ":" in line:
-            key, value = line.split(":", 1)
-            frontmatter[key.strip()] = value.strip().strip('"').strip("'")
-
-    return frontmatter
-
-
-def strip_frontmatter(content: str) -> str:
-    """Remove YAML frontmatter from markdown content."""
-    pattern = r"^---\s*\n.*?\n---\s*\n"
-    return re.sub(pattern, "", content, count=1, flags=re.DOTALL)
+            for entry in _scan_commands_dir(namespace_dir.path)[0]:
+                full_name = f"{namespace}:{entry.name[:-3]}"
+                if full_name in seen or (name_filter is not None and not name_filter(full_name)):
+                    continue
+                seen.add(full_name)
+                frontmatter = read_frontmatter(entry.path)
+                yield CommandEntry(
+                    f"/{full_name}",
+                    entry.path,
+                    source.name,
+                    source.source_type,
+                    frontmatter.get("description", ""),
+                    namespace,
+                )
+
+
+def _scan_commands_dir(path: str | Path) -> tuple[list[os.DirEntry], list[os.DirEntry]]:
+    """Return (.md files, subdirectories) of path, each sorted by name.
+
+    Entry types come from the directory listing where the OS provides them;
+    symlinks are followed, as with Path.glob() + read_text().
+    """
+    files: list[os.DirEntry] = []
+    dirs: list[os.DirEntry] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs.append(entry)
+            elif entry.name.endswith(".md") and entry.is_file():
+                files.append(entry)
+    files.sort(key=lambda e: e.name)
+    dirs.sort(key=lambda e: e.name)
+    return files, dirs
 
 
 def load_command_details(command_path: Path, source: CommandSource) -> dict:
@@ -234,9 +346,7 @@ def load_command_details(command_path: Path, source: CommandSource) -> dict:
 
     Detects namespaced commands by checking if the parent directory is not the source path.
     """
-    content = command_path.read_text(encoding="utf-8")
-    frontmatter = parse_frontmatter(content)
-    body = strip_frontmatter(content)
+    frontmatter, body = load_markdown(command_path)
 
     # Detect if this is a namespaced command
     parent_dir = command_path.parent
@@ -253,7 +363,7 @@ def load_command_details(command_path: Path, source: CommandSource) -> dict:
         "path": str(command_path),
         "source": source.name,
         "source_type": source.source_type,
-        "frontmatter": frontmatter,
+        "frontmatter": dict(frontmatter),
         "body": body,
     }
 
@@ -263,8 +373,8 @@ def load_command_prompt(command_path: Path) -> str:
 
     This is the main function used by agents to get the executable prompt.
     """
-    content = command_path.read_text(encoding="utf-8")
-    return strip_frontmatter(content).strip()
+    _, body = load_markdown(command_path)
+    return body.strip()
 
 
 def interpolate_arguments(prompt: str, args: list[str]) -> str:
@@ -280,14 +390,39 @@ def interpolate_arguments(prompt: str, args: list[str]) -> str:
     Returns:
         Prompt with arguments interpolated
     """
-    result = prompt
+    return render_interpolation(compile_interpolation(prompt), args)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_interpolation(prompt: str) -> tuple[str, ...]:
+    """Split a prompt into literal text and placeholder tokens, once per prompt.
+
+    The result alternates literal, token, literal, ... where each token is
+    "@" or a decimal index (without the "$"). Cached, so interpolating the
+    same prompt with many argument lists scans it only once.
+    """
+    return tuple(ARGUMENT_PATTERN.split(prompt))
 
-    # Replace $@ with all arguments
-    if "$@" in result:
-        result = result.replace("$@", " ".join(args))
 
-    # Replace positional arguments $1, $2, etc.
-    for i, arg in enumerate(args, start=1):
-        result = result.replace(f"${i}", arg)
+def render_interpolation(parts: tuple[str, ...], args: list[str]) -> str:
+    """Fill the tokens from compile_interpolation() with args.
 
-    return result
+    Placeholders without a matching argument are left as written. Values
+    are inserted verbatim, so placeholders inside them are not expanded.
+    """
+    out = list(parts)
+    joined = None
+    for i in range(1, len(out), 2):
+        token = out[i]
+        if token == "@":
+            if joined is None:
+                joined = " ".join(args)
+            out[i] = joined
+        else:
+            try:
+                index = int(token) - 1
+            except ValueError:
+                # More digits than int() converts; no argument can match
+                index = -1
+            out[i] = args[index] if 0 <= index < len(args) else "$" + token
+    return "".join(out)
@@ -2,15 +2,25 @@
 
 from __future__ import annotations
 
+import functools
 import json
-import re
+import os
+import stat
 from dataclasses import dataclass
 from pathlib import Path
 
 from subspace import debug
+from subspace.core.cache import ttl_cache
+# parse_frontmatter/strip_frontmatter are re-exported for existing importers
+from subspace.core.frontmatter import (
+    load_markdown,
+    parse_frontmatter,
+    read_frontmatter,
+    strip_frontmatter,
+)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentSource:
     """Represents a source for agent definitions."""
 
@@ -20,6 +30,31 @@ class AgentSource:
     priority: int       # Lower = higher priority
 
 
+@dataclass(slots=True)
+class AgentEntry:
+    """An agent found by list_all_agents()."""
+
+    name: str
+    path: str
+    source: str
+    source_type: str
+    description: str
+
+    def to_dict(self) -> dict:
+        """Return the JSON form."""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "source": self.source,
+            "source_type": self.source_type,
+            "description": self.description,
+        }
+
+
+# How long (seconds) a source directory probe is reused before re-checking
+SOURCE_CACHE_TTL = 1.0
+
+
 def load_installed_plugins() -> list[dict]:
     """Load installed plugins from ~/.claude/plugins/installed_plugins.json.
 
@@ -32,12 +67,32 @@ def load_installed_plugins() -> list[dict]:
       }
     }
     """
-    plugins_file = Path.home() / ".claude" / "plugins" / "installed_plugins.json"
-    if not plugins_file.is_file():
+    plugins_file = os.path.join(
+        os.path.expanduser("~"), ".claude", "plugins", "installed_plugins.json"
+    )
+    try:
+        st = os.stat(plugins_file)
+    except OSError:
+        return []
+    if not stat.S_ISREG(st.st_mode):
         return []
 
+    plugins = _parse_installed_plugins(plugins_file, st.st_mtime_ns, st.st_size)
+    return [{"name": name, "path": path} for name, path in plugins]
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_installed_plugins(
+    plugins_file: str, mtime_ns: int, size: int
+) -> tuple[tuple[str, str], ...]:
+    """Parse installed_plugins.json into (name, path) pairs.
+
+    Cached per path, mtime and size, so an unchanged file is parsed once per
+    process. json.loads takes the UTF-8 bytes directly.
+    """
     try:
-        data = json.loads(plugins_file.read_text(encoding="utf-8"))
+        with open(plugins_file, "rb") as f:
+            data = json.loads(f.read())
         plugins_dict = data.get("plugins", {})
 
         result = []
@@ -50,12 +105,12 @@ def load_installed_plugins() -> list[dict]:
             if install_path:
                 # Extract plugin name from key (e.g., "feature-dev@scope" -> "feature-dev")
                 name = plugin_key.split("@")[0] if "@" in plugin_key else plugin_key
-                result.append({"name": name, "path": install_path})
+                result.append((name, install_path))
 
-        return result
+        return tuple(result)
     except (json.JSONDecodeError, KeyError, TypeError) as e:
         debug(f"Failed to parse plugins file: {plugins_file}: {e}")
-        return []
+        return ()
 
 
 def get_project_root() -> Path:
@@ -64,56 +119,83 @@ def get_project_root() -> Path:
 
 
 def get_agent_sources(project_root: Path | None = None) -> list[AgentSource]:
-    """Return all agent sources in priority order, filtered to existing paths."""
+    """Return all agent sources in priority order, filtered to existing paths.
+
+    find_agent() and list_all_agents() rely on this order rather than
+    re-sorting.
+
+    The directory probes are memoized per (project_root, home directory) for
+    SOURCE_CACHE_TTL seconds after each probe, so repeated calls in one
+    process don't re-stat the same paths while directories created later are
+    still picked up. invalidate_source_cache() makes them visible at once.
+    """
     if project_root is None:
         project_root = get_project_root()
 
+    sources = _scan_agent_sources(project_root, Path.home())
+    for source in sources:
+        debug("Found %s agents: %s", source.name, source.path)
+    return list(sources)
+
+
+def invalidate_source_cache() -> None:
+    """Forget memoized source probes and agent indexes, e.g. after adding files."""
+    _scan_agent_sources.cache_clear()
+    _agent_files.cache_clear()
+
+
+@ttl_cache(SOURCE_CACHE_TTL, maxsize=4)
+def _scan_agent_sources(project_root: Path, home: Path) -> tuple[AgentSource, ...]:
+    """Probe the project, user, and plugin agent directories.
+
+    installed_plugins.json is read here, so it is parsed at most once per
+    cache entry as well.
+
+    Each result is reused for SOURCE_CACHE_TTL seconds; see get_agent_sources().
+    """
     sources: list[AgentSource] = []
 
     # Priority 1: Project-level Claude Code agents
-    claude_project = project_root / ".claude" / "agents"
-    if claude_project.is_dir():
-        sources.append(AgentSource("claude_project", claude_project, "project", 1))
-        debug(f"Found project claude agents: {claude_project}")
+    claude_project = os.path.join(project_root, ".claude", "agents")
+    if os.path.isdir(claude_project):
+        sources.append(AgentSource("claude_project", Path(claude_project), "project", 1))
 
     # Priority 2: Project-level Codex agents
-    codex_project = project_root / ".codex" / "agents"
-    if codex_project.is_dir():
-        sources.append(AgentSource("codex_project", codex_project, "project", 2))
-        debug(f"Found project codex agents: {codex_project}")
+    codex_project = os.path.join(project_root, ".codex", "agents")
+    if os.path.isdir(codex_project):
+        sources.append(AgentSource("codex_project", Path(codex_project), "project", 2))
 
     # Priority 3: User-level Claude Code agents
-    claude_user = Path.home() / ".claude" / "agents"
-    if claude_user.is_dir():
-        sources.append(AgentSource("claude_user", claude_user, "user", 3))
-        debug(f"Found user claude agents: {claude_user}")
+    claude_user = os.path.join(home, ".claude", "agents")
+    if os.path.isdir(claude_user):
+        sources.append(AgentSource("claude_user", Path(claude_user), "user", 3))
 
     # Priority 4: User-level Codex agents
-    codex_user = Path.home() / ".codex" / "agents"
-    if codex_user.is_dir():
-        sources.append(AgentSource("codex_user", codex_user, "user", 4))
-        debug(f"Found user codex agents: {codex_user}")
+    codex_user = os.path.join(home, ".codex", "agents")
+    if os.path.isdir(codex_user):
+        sources.append(AgentSource("codex_user", Path(codex_user), "user", 4))
 
     # Priority 5: Plugin agents
     for plugin in load_installed_plugins():
         plugin_path_str = plugin.get("path", "")
         if not plugin_path_str:
             continue
-        plugin_path = Path(plugin_path_str)
-        plugin_agents = plugin_path / "agents"
-        if plugin_agents.is_dir():
+        plugin_agents = os.path.join(plugin_path_str, "agents")
+        if os.path.isdir(plugin_agents):
             plugin_name = plugin.get("name", "unknown")
             sources.append(
-                AgentSource(f"plugin:{plugin_name}", plugin_agents, "plugin", 5)
+                AgentSource(f"plugin:{plugin_name}", Path(plugin_agents), "plugin", 5)
             )
-            debug(f"Found plugin agents: {plugin_agents}")
 
-    return sources
+    return tuple(sources)
 
 
 def find_agent(name: str, sources: list[AgentSource]) -> tuple[Path, AgentSource] | None:
     """Find agent by name, respecting source priority.
 
+    sources must already be in priority order, as returned by
+    get_agent_sources().
+
     Returns tuple of (agent_path, source) or None if not found.
     """
     # Strip @ prefix and .md suffix if present
@@ -121,80 +203,92 @@ def find_agent(name: str, sources: list[AgentSource]) -> tuple[Path, AgentSource
     if clean_name.endswith(".md"):
         clean_name = clean_name[:-3]
 
-    for source in sorted(sources, key=lambda s: s.priority):
-        agent_path = source.path / f"{clean_name}.md"
-        if agent_path.is_file():
-            debug(f"Found agent '{clean_name}' at {agent_path}")
-            return (agent_path, source)
+    for source in sources:
+        directory = os.fspath(source.path)
+        agent_path = _agent_files(directory).get(clean_name)
+        # The index may be up to SOURCE_CACHE_TTL old: a hit is confirmed
+        # in case the file was since removed, and a miss probes the path for
+        # files added since, or names that differ only in case on
+        # case-insensitive filesystems
+        if agent_path is None or not os.path.isfile(agent_path):
+            agent_path = os.path.join(directory, clean_name + ".md")
+            if not os.path.isfile(agent_path):
+                continue
+        debug("Found agent '%s' at %s", clean_name, agent_path)
+        return (Path(agent_path), source)
 
-    debug(f"Agent '{clean_name}' not found in any source")
+    debug("Agent '%s' not found in any source", clean_name)
     return None
 
 
-def list_all_agents(sources: list[AgentSource]) -> list[dict]:
-    """List all agents from all sources, first-match wins for duplicates."""
+@ttl_cache(SOURCE_CACHE_TTL)
+def _agent_files(directory: str) -> dict[str, str]:
+    """Map agent names to file paths for the .md files in one directory.
+
+    Built with a single scandir and reused for SOURCE_CACHE_TTL seconds, so
+    repeated find_agent() calls don't rescan the directory. Names match file
+    names exactly; find_agent() confirms each hit with a stat and probes the
+    path on a miss. A missing directory yields an empty index.
+    """
+    try:
+        files = _scan_agent_files(directory)
+    except OSError:
+        return {}
+    return {entry.name[:-3]: entry.path for entry in files}
+
+
+def list_all_agents(sources: list[AgentSource]) -> list[AgentEntry]:
+    """List all agents from all sources, first-match wins for duplicates.
+
+    sources must already be in priority order, as returned by
+    get_agent_sources().
+    """
     seen: set[str] = set()
-    agents: list[dict] = []
+    agents: list[AgentEntry] = []
 
-    for source in sorted(sources, key=lambda s: s.priority):
+    for source in sources:
         if not source.path.is_dir():
             continue
 
-        for agent_file in sorted(source.path.glob("*.md")):
-            name = agent_file.stem
+        for entry in _scan_agent_files(source.path):
+            name = entry.name[:-3]
             if name not in seen:
                 seen.add(name)
-                frontmatter = parse_frontmatter(agent_file.read_text(encoding="utf-8"))
-                agents.append({
-                    "name": name,
-                    "path": str(agent_file),
-                    "source": source.name,
-                    "source_type": source.source_type,
-                    "description": frontmatter.get("description", ""),
-                })
+                frontmatter = read_frontmatter(entry.path)
+                agents.append(AgentEntry(
+                    name,
+                    entry.path,
+                    source.name,
+                    source.source_type,
+                    frontmatter.get("description", ""),
+                ))
 
     return agents
 
 
-def parse_frontmatter(content: str) -> dict:
-    """Parse YAML frontmatter from markdown content."""
-    pattern = r"^---\s*\n(.*?)\n---\s*\n"
-    match = re.match(pattern, content, flags=re.DOTALL)
-    if not match:
-        return {}
-
-    frontmatter: dict[str, str] = {}
-    for line in match.group(1).split("\n"):
-        if ":" in line:
-            key, value = line.split(":", 1)
-            frontmatter[key.strip()] = value.strip().strip('"').strip("'")
-
-    return frontmatter
-
-
-def strip_frontmatter(content: str) -> str:
-    """Remove YAML frontmatter from markdown content."""
-    pattern = r"^---\s*\n.*?\n---\s*\n"
-    return re.sub(pattern, "", content, count=1, flags=re.DOTALL)
+def _scan_agent_files(path: str | Path) -> list[os.DirEntry]:
+    """Return the .md files in path sorted by name, following symlinks."""
+    with os.scandir(path) as it:
+        files = [e for e in it if e.name.endswith(".md") and e.is_file()]
+    files.sort(key=lambda e: e.name)
+    return files
 
 
 def load_agent_details(agent_path: Path, source: AgentSource) -> dict:
     """Load full agent details including frontmatter and body."""
-    content = agent_path.read_text(encoding="utf-8")
-    frontmatter = parse_frontmatter(content)
-    body = strip_frontmatter(content)
+    frontmatter, body = load_markdown(agent_path)
 
     return {
         "name": agent_path.stem,
         "path": str(agent_path),
         "source": source.name,
         "source_type": source.source_type,
-        "frontmatter": frontmatter,
+        "frontmatter": dict(frontmatter),
         "body": body,
     }
 
 
 def load_agent_instructions(agent_path: Path) -> str:
     """Load agent instructions (body without frontmatter)."""
-    content = agent_path.read_text(encoding="utf-8")
-    return strip_frontmatter(content)
+    _, body = load_markdown(agent_path)
+    return body
@@ -0,0 +1,107 @@
+"""YAML frontmatter parsing shared by command and agent discovery.
+
+Commands and agents are both markdown files that may start with a
+"---" fenced block of simple key: value lines.
+"""
+
+from __future__ import annotations
+
+import codecs
+import functools
+import os
+import re
+
+# Leading "---" fenced YAML block; group 1 is the block's contents. Callers
+# check content.startswith("---") first so plain markdown (the common case)
+# never enters the regex engine.
+FRONTMATTER_PATTERN = re.compile(r"^---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+
+# Bytes read from the head of a file when only its frontmatter is needed;
+# frontmatter sits at the top, so most files never need a second read
+FRONTMATTER_READ_SIZE = 4096
+
+
+def read_frontmatter(path: str) -> dict:
+    """Parse frontmatter from a markdown file, reading only its head if possible."""
+    with open(path, "rb") as f:
+        data = f.read(FRONTMATTER_READ_SIZE)
+        if len(data) == FRONTMATTER_READ_SIZE:
+            if not data.startswith(b"---"):
+                return {}
+            # The head may end mid-character; a non-final decode holds back
+            # only that cut-off sequence and is otherwise as strict as the
+            # full read below
+            head = codecs.getincrementaldecoder("utf-8")().decode(data, final=False)
+            match = FRONTMATTER_PATTERN.match(head)
+            if match:
+                return _parse_frontmatter_block(match.group(1))
+            data += f.read()
+    return parse_frontmatter(data.decode("utf-8"))
+
+
+def _parse_frontmatter_block(block: str) -> dict:
+    """Parse the key: value lines inside a frontmatter block."""
+    frontmatter: dict[str, str] = {}
+    for line in block.split("\n"):
+        if ":" in line:
+            key, value = line.split(":", 1)
+            value = value.strip()
+            # Remove one pair of matching surrounding quotes
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            frontmatter[key.strip()] = value
+
+    return frontmatter
+
+
+def parse_frontmatter(content: str) -> dict:
+    """Parse YAML frontmatter from markdown content."""
+    if not content.startswith("---"):
+        return {}
+
+    match = FRONTMATTER_PATTERN.match(content)
+    if not match:
+        return {}
+
+    return _parse_frontmatter_block(match.group(1))
+
+
+def strip_frontmatter(content: str) -> str:
+    """Remove YAML frontmatter from markdown content."""
+    if not content.startswith("---"):
+        return content
+
+    return FRONTMATTER_PATTERN.sub("", content, count=1)
+
+
+def split_frontmatter(content: str) -> tuple[dict, str]:
+    """Split markdown content into (frontmatter, body) with a single match.
+
+    Equivalent to (parse_frontmatter(content), strip_frontmatter(content))
+    without scanning for the frontmatter block twice.
+    """
+    if not content.startswith("---"):
+        return {}, content
+
+    match = FRONTMATTER_PATTERN.match(content)
+    if not match:
+        return {}, content
+
+    return _parse_frontmatter_block(match.group(1)), content[match.end():]
+
+
+def load_markdown(path: str | os.PathLike) -> tuple[dict, str]:
+    """Return (frontmatter, body) for a markdown file, reusing unchanged reads.
+
+    The stat result keys the cache, so an edited file is re-read. Callers must
+    not mutate the returned frontmatter dict.
+    """
+    st = os.stat(path)
+    return _load_markdown(os.fspath(path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _load_markdown(path: str, mtime_ns: int, size: int) -> tuple[dict, str]:
+    """Read and split a markdown file (cached per path, mtime and size)."""
+    with open(path, encoding="utf-8") as f:
+        return split_frontmatter(f.read())
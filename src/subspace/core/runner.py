@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
 import os
 import re
+import selectors
 import shutil
+import stat
 import subprocess
 import sys
 import time
@@ -22,8 +25,20 @@ if TYPE_CHECKING:
 # Directory for subagent credential sync (relative to workspace root)
 SUBAGENT_CODEX_HOME = ".subspace/codex-subagent"
 
-# Valid agent name pattern: alphanumeric, hyphen, underscore only
-AGENT_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9_-]+$")
+# Valid agent name pattern: alphanumeric, hyphen, underscore only (use fullmatch)
+AGENT_NAME_PATTERN = re.compile(r"[a-zA-Z0-9_-]+")
+
+# Files synced from ~/.codex into SUBAGENT_CODEX_HOME: model settings, API
+# credentials (when logged in via `codex auth`), and the subspace CLI
+# instructions for slash commands and subagents
+CODEX_HOME_SYNC_FILES = ("config.toml", "auth.json", "AGENTS.md")
+
+# Bytes requested per os.read() of a subprocess stdout pipe
+STDOUT_READ_SIZE = 65536
+
+# Whether selectors can wait on subprocess pipes; on Windows select() only
+# accepts sockets, so the sync runner falls back to communicate()
+SELECTABLE_PIPES = os.name == "posix"
 
 
 def validate_agent_name(name: str) -> None:
@@ -33,7 +48,7 @@ def validate_agent_name(name: str) -> None:
     """
     if not name:
         raise ValueError("Agent name cannot be empty")
-    if not AGENT_NAME_PATTERN.match(name):
+    if not AGENT_NAME_PATTERN.fullmatch(name):
         raise ValueError(
             f"Invalid agent name '{name}': must contain only alphanumeric, "
             "hyphen, or underscore characters"
@@ -69,25 +84,59 @@ class AgentResult:
 def _safe_copy_file(src: Path, dst: Path) -> bool:
     """Safely copy a file, rejecting symlinks to prevent symlink attacks.
 
+    Skips the copy when dst is already up to date (see _needs_copy). The
+    copy is written to a temporary file and renamed into place, so a
+    concurrent subspace run never sees a partially written dst.
+
     Returns True if file was copied, False if skipped.
     """
+    try:
+        src_stat = os.lstat(src)
+    except OSError:
+        return False
+
     # Security: Reject symlinks to prevent symlink attacks
-    if src.is_symlink():
+    if stat.S_ISLNK(src_stat.st_mode):
         debug(f"Skipping symlink: {src}")
         return False
 
     # Only copy regular files that exist
-    if not src.is_file():
+    if not stat.S_ISREG(src_stat.st_mode):
         return False
 
+    if not _needs_copy(src_stat, dst):
+        return False
+
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
     try:
-        shutil.copy2(src, dst)
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
         return True
     except (OSError, shutil.Error) as e:
         debug(f"Failed to copy {src}: {e}")
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
         return False
 
 
+def _needs_copy(src_stat: os.stat_result, dst: Path) -> bool:
+    """Return True unless dst matches the source's mtime and size.
+
+    copy2 preserves the modification time, so an unchanged source leaves
+    the previous copy matching.
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return True
+    return (
+        dst_stat.st_mtime_ns != src_stat.st_mtime_ns
+        or dst_stat.st_size != src_stat.st_size
+    )
+
+
 def setup_codex_home() -> Path:
     """Sync Codex credentials to workspace for sandboxed subagent execution.
 
@@ -97,46 +146,134 @@ def setup_codex_home() -> Path:
 
     Security: Rejects symlinks to prevent symlink attacks.
 
+    The sync is memoized per workspace, home directory and the source files'
+    stat results, so repeated calls in one process only re-stat the sources.
+    Files already matching their source are not copied again. Setting
+    SUBSPACE_SKIP_SYNC=1 skips the file copies, for workspaces whose copy
+    is managed by hand; the directory is still created.
+
     Returns the absolute path to the workspace CODEX_HOME directory.
     """
-    workspace_home = Path.cwd() / SUBAGENT_CODEX_HOME
-    workspace_home.mkdir(parents=True, exist_ok=True)
+    if os.environ.get("SUBSPACE_SKIP_SYNC") == "1":
+        workspace_home = (Path.cwd() / SUBAGENT_CODEX_HOME).absolute()
+        workspace_home.mkdir(parents=True, exist_ok=True)
+        debug(f"SUBSPACE_SKIP_SYNC=1, using {workspace_home} as is")
+        return workspace_home
 
     user_codex_home = Path.home() / ".codex"
+    return _sync_codex_home(
+        Path.cwd() / SUBAGENT_CODEX_HOME,
+        user_codex_home,
+        _codex_sources_state(user_codex_home),
+    )
+
+
+def _codex_sources_state(user_codex_home: Path) -> tuple:
+    """Return (mode, mtime_ns, size) for each synced file, or None if missing."""
+    state = []
+    for name in CODEX_HOME_SYNC_FILES:
+        try:
+            st = os.lstat(user_codex_home / name)
+        except OSError:
+            state.append(None)
+        else:
+            state.append((st.st_mode, st.st_mtime_ns, st.st_size))
+    return tuple(state)
+
 
-    # Copy config.toml (model settings, preferences)
-    config_src = user_codex_home / "config.toml"
-    if _safe_copy_file(config_src, workspace_home / "config.toml"):
-        debug(f"Synced config.toml to {workspace_home}")
+@functools.lru_cache(maxsize=4)
+def _sync_codex_home(workspace_home: Path, user_codex_home: Path, sources_state: tuple) -> Path:
+    """Copy the CODEX_HOME_SYNC_FILES into workspace_home.
 
-    # Copy auth.json (API credentials when logged in via `codex auth`)
-    auth_src = user_codex_home / "auth.json"
-    if _safe_copy_file(auth_src, workspace_home / "auth.json"):
-        debug(f"Synced auth.json to {workspace_home}")
+    Cached per arguments; sources_state only serves to invalidate the entry
+    when a source file changes.
+    """
+    workspace_home.mkdir(parents=True, exist_ok=True)
 
-    # Copy AGENTS.md (subspace CLI instructions for slash commands, subagents)
-    agents_src = user_codex_home / "AGENTS.md"
-    if _safe_copy_file(agents_src, workspace_home / "AGENTS.md"):
-        debug(f"Synced AGENTS.md to {workspace_home}")
+    for name in CODEX_HOME_SYNC_FILES:
+        if _safe_copy_file(user_codex_home / name, workspace_home / name):
+            debug(f"Synced {name} to {workspace_home}")
 
     return workspace_home.absolute()
 
 
-def build_payload(agent_name: str, instructions: str, task: str) -> dict:
-    """Build the JSON payload for codex exec."""
-    guidance = SUBAGENT_GUIDANCE.format(agent_name=agent_name)
-    combined_instructions = f"{guidance}\n---\n\n{instructions}"
+def build_payload(
+    agent_name: str, instructions: str, task: str, started_at: str | None = None
+) -> dict:
+    """Build the JSON payload for codex exec.
+
+    started_at defaults to the current UTC time; batches pass one shared
+    timestamp.
+    """
+    combined_instructions = f"{_subagent_guidance(agent_name)}\n---\n\n{instructions}"
 
     return {
         "instructions": combined_instructions,
         "task": task,
         "metadata": {
             "agentName": agent_name,
-            "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "startedAt": started_at or _utc_timestamp(),
         },
     }
 
 
+@functools.lru_cache(maxsize=32)
+def _subagent_guidance(agent_name: str) -> str:
+    """Return SUBAGENT_GUIDANCE for agent_name, built once per name."""
+    # The template has a single placeholder, so replace() beats format()
+    return SUBAGENT_GUIDANCE.replace("{agent_name}", agent_name)
+
+
+def _utc_timestamp() -> str:
+    """Return the current UTC time as used in payload metadata."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def encode_payload(payload: dict) -> bytes:
+    """Serialize a payload for codex's stdin as compact UTF-8 JSON."""
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+class AgentMessageExtractor:
+    """Incrementally collect agent_message text from Codex JSONL events.
+
+    Lines are fed one at a time as they are read, so the raw event stream is
+    never buffered; only the extracted message text is kept.
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    def feed(self, line: str | bytes) -> None:
+        """Process one JSONL line (str or UTF-8 bytes)."""
+        # Cheap substring prefilter: most events (reasoning, commands, turn
+        # markers) can't be agent messages, so skip them before json.loads
+        if isinstance(line, bytes):
+            if b'"agent_message"' not in line or b'"item.completed"' not in line:
+                return
+        elif '"agent_message"' not in line or '"item.completed"' not in line:
+            return
+
+        try:
+            event = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+
+        # Look for item.completed events with type: agent_message. The
+        # prefilter only checks substrings, so the shape is still verified.
+        if not isinstance(event, dict) or event.get("type") != "item.completed":
+            return
+        item = event.get("item")
+        if isinstance(item, dict) and item.get("type") == "agent_message":
+            text = item.get("text")
+            if text and isinstance(text, str):
+                self.messages.append(text)
+
+    def result(self) -> str:
+        """Return the collected messages joined by blank lines."""
+        return "\n\n".join(self.messages)
+
+
 def extract_agent_messages(jsonl_lines: list[str]) -> str:
     """Extract all agent_message text from JSONL events.
 
@@ -149,36 +286,19 @@ def extract_agent_messages(jsonl_lines: list[str]) -> str:
     Returns:
         Concatenated text from all agent_message items, joined by newlines.
     """
-    messages: list[str] = []
-
+    extractor = AgentMessageExtractor()
     for line in jsonl_lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        try:
-            event = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-
-        # Look for item.completed events with type: agent_message
-        if event.get("type") == "item.completed":
-            item = event.get("item", {})
-            if item.get("type") == "agent_message":
-                text = item.get("text", "")
-                if text:
-                    messages.append(text)
+        extractor.feed(line)
+    return extractor.result()
 
-    return "\n\n".join(messages)
 
-
-def build_vanilla_payload(task: str) -> dict:
+def build_vanilla_payload(task: str, started_at: str | None = None) -> dict:
     """Build the JSON payload for vanilla codex exec (no custom instructions)."""
     return {
         "task": task,
         "metadata": {
             "agentName": "codex",
-            "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "startedAt": started_at or _utc_timestamp(),
         },
     }
 
@@ -277,6 +397,19 @@ def run_agent(
     return result.returncode
 
 
+def _split_lines(tail: bytes, chunk: bytes) -> tuple[list[bytes], bytes]:
+    """Split tail + chunk into complete lines and the unterminated remainder."""
+    lines = (tail + chunk).split(b"\n")
+    return lines, lines.pop()
+
+
+def _codex_env(codex_home: Path) -> dict[str, str]:
+    """Return the process environment with CODEX_HOME pointed at codex_home."""
+    if "CODEX_HOME" in os.environ:
+        debug(f"Overriding existing CODEX_HOME: {os.environ['CODEX_HOME']}")
+    return {**os.environ, "CODEX_HOME": str(codex_home)}
+
+
 def _run_codex_sync(
     payload: dict,
     codex_bin: str,
@@ -284,12 +417,14 @@ def _run_codex_sync(
     timeout: int,
     output_format: str,
     enable_debug: bool,
+    env: dict[str, str] | None = None,
 ) -> AgentResult:
     """Run codex exec synchronously in sandbox mode.
 
     Always runs with --json flag for reliable structured output.
     For text mode, parses JSONL and extracts agent messages.
     For jsonl mode, streams events directly to stdout.
+    env defaults to _codex_env(codex_home).
     """
     start_time = time.time()
     agent_name = payload.get("metadata", {}).get("agentName", "subagent")
@@ -297,11 +432,8 @@ def _run_codex_sync(
 
     debug(f"Running {agent_name} (sandbox: workspace-write)")
 
-    # Build environment with CODEX_HOME override
-    env = os.environ.copy()
-    if "CODEX_HOME" in env:
-        debug(f"Overriding existing CODEX_HOME: {env['CODEX_HOME']}")
-    env["CODEX_HOME"] = str(codex_home)
+    if env is None:
+        env = _codex_env(codex_home)
 
     # Always use --json for reliable structured output
     cmd = [codex_bin, "exec", "--sandbox", "workspace-write", "--json"]
@@ -314,8 +446,7 @@ def _run_codex_sync(
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            bufsize=0,
             env=env,
         )
     except FileNotFoundError:
@@ -344,33 +475,85 @@ def _run_codex_sync(
             error="Failed to open subprocess pipes",
         )
 
-    payload_json = json.dumps(payload)
-    debug(f"Payload size: {len(payload_json)} bytes")
+    payload_bytes = encode_payload(payload)
+    debug(f"Payload size: {len(payload_bytes)} bytes")
 
-    # Send payload
-    proc.stdin.write(payload_json)
-    proc.stdin.flush()
-    proc.stdin.close()
-
-    # Collect JSONL lines (for text extraction) or stream them (for jsonl mode)
-    jsonl_lines: list[str] = []
+    # Extract agent messages as lines arrive (text mode) or stream them (jsonl mode)
+    extractor = AgentMessageExtractor()
+    if stream_jsonl:
+        # Anything printed as text so far must precede the raw bytes
+        sys.stdout.flush()
+    # Replaced stdout streams (e.g. io.StringIO) have no binary buffer
+    stdout_buffer = getattr(sys.stdout, "buffer", None)
+
+    def handle_lines(lines: list[bytes]) -> None:
+        if stream_jsonl:
+            # Stream directly to stdout, one write and flush per chunk
+            out = b"".join(line.strip() + b"\n" for line in lines if line.strip())
+            if not out:
+                return
+            if stdout_buffer is not None:
+                stdout_buffer.write(out)
+                stdout_buffer.flush()
+            else:
+                sys.stdout.write(out.decode("utf-8", errors="replace"))
+                sys.stdout.flush()
+        else:
+            for line in lines:
+                extractor.feed(line)
 
+    deadline = time.monotonic() + timeout
     try:
-        for line in proc.stdout:
-            line = line.strip()
-            if line:
-                if stream_jsonl:
-                    # Stream directly to stdout
-                    print(line, flush=True)
-                else:
-                    # Collect for text extraction
-                    jsonl_lines.append(line)
-
-        proc.wait(timeout=timeout)
+        if SELECTABLE_PIPES:
+            # stdin is unbuffered, so one write() may take only part of a
+            # large payload
+            view = memoryview(payload_bytes)
+            while view:
+                view = view[proc.stdin.write(view):]
+            proc.stdin.close()
+
+            # Wait on both pipes so a chatty stderr can't fill up and stall
+            # the child, and so the timeout also covers the reading phase.
+            # stdout is read in large chunks and split into lines here,
+            # rather than one read and one decode per line through a text
+            # wrapper.
+            with selectors.DefaultSelector() as sel:
+                sel.register(proc.stdout, selectors.EVENT_READ)
+                sel.register(proc.stderr, selectors.EVENT_READ)
+                tail = b""
+                while sel.get_map():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(cmd, timeout)
+                    for key, _ in sel.select(remaining):
+                        chunk = os.read(key.fd, STDOUT_READ_SIZE)
+                        if not chunk:
+                            sel.unregister(key.fileobj)
+                            if key.fileobj is proc.stdout:
+                                handle_lines([tail])
+                        elif key.fileobj is proc.stdout:
+                            lines, tail = _split_lines(tail, chunk)
+                            handle_lines(lines)
+                        # stderr output is drained and discarded
+
+            proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        else:
+            # communicate() sends the payload and drains both pipes with
+            # helper threads; output is handled once the child exits
+            stdout_data, _ = proc.communicate(payload_bytes, timeout=timeout)
+            lines, tail = _split_lines(b"", stdout_data)
+            handle_lines(lines)
+            handle_lines([tail])
         returncode = proc.returncode or 0
     except subprocess.TimeoutExpired:
         proc.kill()
-        proc.communicate()
+        if SELECTABLE_PIPES:
+            # Not communicate(): it would try to flush the already closed stdin
+            proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+        else:
+            proc.communicate()
         return AgentResult(
             agent=agent_name,
             output="",
@@ -391,43 +574,35 @@ def _run_codex_sync(
             elapsed=elapsed,
         )
     else:
-        # Extract agent messages from collected JSONL
-        final_output = extract_agent_messages(jsonl_lines)
         return AgentResult(
             agent=agent_name,
-            output=final_output,
+            output=extractor.result(),
             returncode=returncode,
             elapsed=elapsed,
         )
 
 
+def default_max_parallel() -> int:
+    """Return the default cap on concurrent codex processes: CPU count, at most 8."""
+    return min(os.cpu_count() or 1, 8)
+
+
 def parse_agent_task_pair(pair: str) -> tuple[str, str]:
     """Parse 'agent:task' or 'agent:"task with spaces"' format.
 
     Validates agent names to prevent path traversal attacks.
     Raises ValueError if format is invalid or agent name is unsafe.
     """
-    agent: str | None = None
-    task: str | None = None
-
-    # Handle quoted task: agent:"task here"
-    match = re.match(r'^([^:]+):"(.+)"$', pair)
-    if match:
-        agent, task = match.group(1), match.group(2)
-
-    # Handle quoted task with single quotes: agent:'task here'
-    if agent is None:
-        match = re.match(r"^([^:]+):'(.+)'$", pair)
-        if match:
-            agent, task = match.group(1), match.group(2)
-
-    # Simple split on first colon
-    if agent is None and ":" in pair:
-        agent, task = pair.split(":", 1)
-
-    if agent is None or task is None:
+    agent, sep, task = pair.partition(":")
+    if not sep:
         raise ValueError(f"Invalid agent:task format: {pair}")
 
+    # Strip quotes only when they wrap the whole single-line task (a final
+    # newline after the closing quote is tolerated)
+    quoted = task[:-1] if task.endswith("\n") else task
+    if len(quoted) > 2 and quoted[0] in "\"'" and quoted[-1] == quoted[0] and "\n" not in quoted:
+        task = quoted[1:-1]
+
     # Strip whitespace
     agent = agent.strip()
     task = task.strip()
@@ -448,8 +623,13 @@ def run_parallel(
     timeout: int = 600,
     enable_debug: bool = False,
     codex_bin: str = "codex",
+    max_parallel: int | None = None,
 ) -> int:
-    """Run multiple agents in parallel."""
+    """Run multiple agents in parallel.
+
+    At most max_parallel codex processes run at once (default:
+    default_max_parallel()).
+    """
     from subspace.core.discovery import find_agent, load_agent_instructions
 
     # Parse agent:task pairs
@@ -473,17 +653,26 @@ def run_parallel(
         print("Error: No agent:task pairs provided", file=sys.stderr)
         return 1
 
-    debug(f"Running {len(requests)} agents in parallel")
+    if max_parallel is None:
+        max_parallel = default_max_parallel()
+    elif max_parallel < 1:
+        print("Error: --max-parallel must be at least 1", file=sys.stderr)
+        return 1
+
+    debug(f"Running {len(requests)} agents in parallel (max {max_parallel} at once)")
 
     # Setup sandboxed CODEX_HOME (shared by all agents)
     codex_home = setup_codex_home()
 
     start_time = time.time()
-    all_results: list[AgentResult] = []
+    # Only the totals are needed afterwards, so keep just those fields
+    elapsed_times: list[float] = []
+    returncodes: list[int] = []
 
     def on_result(result: AgentResult, agent_id: str) -> None:
         """Handle result as soon as agent completes."""
-        all_results.append(result)
+        elapsed_times.append(result.elapsed)
+        returncodes.append(result.returncode)
 
         if output_format == "jsonl":
             print(json.dumps({
@@ -515,11 +704,12 @@ def run_parallel(
             timeout=timeout,
             output_format=output_format,
             on_complete=on_result,
+            max_parallel=max_parallel,
         )
     )
 
     wall_time = time.time() - start_time
-    total_agent_time = sum(r.elapsed for r in all_results)
+    total_agent_time = sum(elapsed_times)
 
     if output_format == "text":
         print(
@@ -528,7 +718,7 @@ def run_parallel(
             file=sys.stderr,
         )
 
-    return max((r.returncode for r in all_results), default=0)
+    return max(returncodes, default=0)
 
 
 async def _run_parallel_async(
@@ -538,40 +728,55 @@ async def _run_parallel_async(
     timeout: int,
     output_format: str,
     on_complete,
+    max_parallel: int | None = None,
 ) -> list[AgentResult]:
-    """Run multiple agents in parallel using asyncio."""
+    """Run multiple agents in parallel using asyncio.
+
+    A semaphore keeps at most max_parallel codex processes running; None
+    means no limit.
+    """
     from subspace.core.discovery import load_agent_instructions
 
-    # Create tasks and track agent_ids
-    task_list: list[asyncio.Task] = []
-    agent_ids: list[str] = []
+    # One environment and start time for every agent in the batch
+    env = _codex_env(codex_home)
+    started_at = _utc_timestamp()
 
-    for idx, (agent_name, task, agent_path) in enumerate(requests):
-        instructions = load_agent_instructions(agent_path)
-        payload = build_payload(agent_name, instructions, task)
-        agent_id = f"{agent_name}-{idx}"
+    async def load_payload(agent_name: str, task: str, agent_path: Path) -> dict:
+        # Read in a worker thread so the files load concurrently without
+        # blocking the event loop
+        instructions = await asyncio.to_thread(load_agent_instructions, agent_path)
+        return build_payload(agent_name, instructions, task, started_at)
 
-        coro = _run_codex_async(
-            payload=payload,
-            codex_bin=codex_bin,
-            codex_home=codex_home,
-            timeout=timeout,
-            output_format=output_format,
-            agent_id=agent_id,
-        )
-        task_obj = asyncio.create_task(coro)
-        task_list.append(task_obj)
-        agent_ids.append(agent_id)
+    payloads = await asyncio.gather(*(load_payload(*request) for request in requests))
 
-    # Create mapping from task identity to agent_id
-    task_to_agent: dict[int, str] = {id(t): aid for t, aid in zip(task_list, agent_ids)}
+    slots = asyncio.Semaphore(max_parallel or len(requests) or 1)
 
-    results = []
-    # Use gather with return_exceptions to get all results
-    done_tasks = await asyncio.gather(*task_list, return_exceptions=True)
+    async def run_one(agent_id: str, payload: dict) -> tuple[str, AgentResult | Exception]:
+        # Pair each result with its agent_id, since as_completed() doesn't
+        # preserve which task finished
+        try:
+            async with slots:
+                return agent_id, await _run_codex_async(
+                    payload=payload,
+                    codex_bin=codex_bin,
+                    codex_home=codex_home,
+                    timeout=timeout,
+                    output_format=output_format,
+                    agent_id=agent_id,
+                    env=env,
+                )
+        except Exception as e:
+            return agent_id, e
+
+    coros = [
+        run_one(f"{agent_name}-{idx}", payload)
+        for idx, ((agent_name, _, _), payload) in enumerate(zip(requests, payloads))
+    ]
 
-    for task_obj, result_or_exc in zip(task_list, done_tasks):
-        agent_id = task_to_agent[id(task_obj)]
+    results = []
+    # Report each agent as soon as it finishes, not in submission order
+    for next_done in asyncio.as_completed(coros):
+        agent_id, result_or_exc = await next_done
 
         if isinstance(result_or_exc, Exception):
             # Handle exception case
@@ -598,23 +803,22 @@ async def _run_codex_async(
     timeout: int,
     output_format: str,
     agent_id: str,
+    env: dict[str, str] | None = None,
 ) -> AgentResult:
     """Run codex exec asynchronously in sandbox mode.
 
     Always runs with --json flag for reliable structured output.
     For text mode, parses JSONL and extracts agent messages.
     For jsonl mode, streams events with agent_id tagging.
+    env defaults to _codex_env(codex_home); parallel runs build it once.
     """
     start_time = time.time()
     agent_name = payload.get("metadata", {}).get("agentName", "subagent")
-    payload_json = json.dumps(payload)
+    payload_bytes = encode_payload(payload)
     stream_jsonl = output_format == "jsonl"
 
-    # Build environment with CODEX_HOME override
-    env = os.environ.copy()
-    if "CODEX_HOME" in env:
-        debug(f"Overriding existing CODEX_HOME: {env['CODEX_HOME']}")
-    env["CODEX_HOME"] = str(codex_home)
+    if env is None:
+        env = _codex_env(codex_home)
 
     # Always use --json for reliable structured output
     cmd = [codex_bin, "exec", "--sandbox", "workspace-write", "--json"]
@@ -624,7 +828,9 @@ async def _run_codex_async(
             *cmd,
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            # stderr is never read; an unread pipe would stall a chatty child
+            # until the timeout while it holds a max_parallel slot
+            stderr=asyncio.subprocess.DEVNULL,
             env=env,
         )
     except FileNotFoundError:
@@ -645,53 +851,60 @@ async def _run_codex_async(
         )
 
     # Send payload
-    proc.stdin.write(payload_json.encode())
+    proc.stdin.write(payload_bytes)
     await proc.stdin.drain()
     proc.stdin.close()
 
-    # Collect JSONL lines (for text extraction) or stream them (for jsonl mode)
-    jsonl_lines: list[str] = []
+    # Extract agent messages as lines arrive (text mode) or stream them (jsonl mode)
+    extractor = AgentMessageExtractor()
 
-    try:
+    def tag_event(line_str: str) -> str:
+        """Wrap one event line with agent_id and agent_name for streaming."""
+        try:
+            event = json.loads(line_str)
+        except json.JSONDecodeError:
+            # Pass through non-JSON lines
+            return line_str
+        return json.dumps({
+            "agent_id": agent_id,
+            "agent_name": agent_name,
+            "event": event,
+        })
+
+    async def read_events() -> None:
+        # Read in chunks, like the sync runner, so streamed events go out
+        # with one write and flush per chunk instead of a print per line
+        tail = b""
         while True:
-            try:
-                line = await asyncio.wait_for(
-                    proc.stdout.readline(),
-                    timeout=timeout,
-                )
-                if not line:
-                    break
-                line_str = line.decode().strip()
-                if line_str:
-                    if stream_jsonl:
-                        # Tag each event with agent_id and stream
-                        try:
-                            event = json.loads(line_str)
-                            tagged = {
-                                "agent_id": agent_id,
-                                "agent_name": agent_name,
-                                "event": event,
-                            }
-                            print(json.dumps(tagged), flush=True)
-                        except json.JSONDecodeError:
-                            # Pass through non-JSON lines
-                            print(line_str, flush=True)
-                    else:
-                        # Collect for text extraction
-                        jsonl_lines.append(line_str)
-            except asyncio.TimeoutError:
-                proc.kill()
-                return AgentResult(
-                    agent=agent_name,
-                    output="",
-                    returncode=-1,
-                    elapsed=time.time() - start_time,
-                    error=f"Timeout after {timeout}s",
+            chunk = await proc.stdout.read(STDOUT_READ_SIZE)
+            if chunk:
+                lines, tail = _split_lines(tail, chunk)
+            else:
+                lines = [tail]
+
+            if stream_jsonl:
+                out = "".join(
+                    tag_event(line_str) + "\n"
+                    for line_str in (line.decode(errors="replace").strip() for line in lines)
+                    if line_str
                 )
+                if out:
+                    sys.stdout.write(out)
+                    sys.stdout.flush()
+            else:
+                # The extractor prefilters raw bytes; only matches get decoded
+                for line in lines:
+                    extractor.feed(line)
+
+            if not chunk:
+                break
 
         await proc.wait()
-        returncode = proc.returncode or 0
 
+    # One deadline for the whole run, rather than a fresh timer per line that
+    # also restarted the timeout every time output arrived
+    try:
+        await asyncio.wait_for(read_events(), timeout=timeout)
     except asyncio.TimeoutError:
         proc.kill()
         await proc.communicate()
@@ -702,17 +915,12 @@ async def _run_codex_async(
             elapsed=time.time() - start_time,
             error=f"Timeout after {timeout}s",
         )
-
-    if stream_jsonl:
-        # Already streamed, no output to return
-        final_output = ""
-    else:
-        # Extract agent messages from collected JSONL
-        final_output = extract_agent_messages(jsonl_lines)
+    returncode = proc.returncode or 0
 
     return AgentResult(
         agent=agent_name,
-        output=final_output,
+        # In jsonl mode everything was already streamed; nothing was fed
+        output=extractor.result(),
         returncode=returncode,
         elapsed=time.time() - start_time,
     )
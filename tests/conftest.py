@@ -0,0 +1,45 @@
+"""Shared fixtures for the test suite."""
+
+import shutil
+
+import pytest
+
+# Canonical command tree used by the discovery tests: project commands
+# (including a namespace) plus a user-level copy of /deploy.
+COMMAND_TREE = {
+    ".claude/commands/cmd1.md": "---\ndescription: First command\n---\n\nBody 1\n",
+    ".claude/commands/cmd2.md": "Body 2 no frontmatter",
+    ".claude/commands/deploy.md": "Project deploy",
+    ".claude/commands/test_cmd.md": "Test command content",
+    ".claude/commands/subspace/sweep.md": "Sweep command content",
+    ".claude/commands/subspace/clean.md": "Clean",
+    "home/.claude/commands/deploy.md": "User deploy",
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_source_caches():
+    """Start every test with empty source and index caches."""
+    from subspace.core import commands, discovery
+
+    commands.invalidate_source_cache()
+    discovery.invalidate_source_cache()
+
+
+@pytest.fixture(scope="session")
+def cmd_tree_template(tmp_path_factory):
+    """Write COMMAND_TREE once per session."""
+    root = tmp_path_factory.mktemp("cmd_tree")
+    for rel_path, content in COMMAND_TREE.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+@pytest.fixture
+def cmd_tree(tmp_path, cmd_tree_template):
+    """A private copy of COMMAND_TREE; returns its root."""
+    root = tmp_path / "root"
+    shutil.copytree(cmd_tree_template, root)
+    return root
@@ -73,3 +73,287 @@ class TestCliModuleImports:
         assert hasattr(discovery, "find_agent")
         assert hasattr(discovery, "list_all_agents")
         assert hasattr(discovery, "get_agent_sources")
+
+
+class TestDebug:
+    """Tests for the debug() helper."""
+
+    @pytest.mark.parametrize("args, expected", [
+        (("plain",), "[DEBUG] plain"),
+        (("50% done",), "[DEBUG] 50% done"),
+        (("found %s from %s", "x.md", "user"), "[DEBUG] found x.md from user"),
+        (("%d%% done", 50), "[DEBUG] 50% done"),
+    ])
+    def test_formats_only_with_args(self, monkeypatch, capsys, args, expected):
+        """msg is printed as is alone and %-formatted when args are given."""
+        import subspace
+
+        monkeypatch.setattr(subspace, "DEBUG", True)
+        subspace.debug(*args)
+        assert capsys.readouterr().err == expected + "\n"
+
+    def test_mismatched_args_raise(self, monkeypatch):
+        """A print-style call with extra args is an error, not a guess."""
+        import subspace
+
+        monkeypatch.setattr(subspace, "DEBUG", True)
+        with pytest.raises(TypeError):
+            subspace.debug("found", "/tmp/x.md")
+
+    def test_args_not_formatted_when_disabled(self, monkeypatch, capsys):
+        """With DEBUG off nothing is formatted or printed."""
+        import subspace
+
+        monkeypatch.setattr(subspace, "DEBUG", False)
+        subspace.debug("found", "/tmp/x.md")
+        assert capsys.readouterr().err == ""
+
+
+def _subcommand_choices(parser: argparse.ArgumentParser) -> dict:
+    """Return {name: subparser} for the parser's subcommands."""
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            return action.choices
+    return {}
+
+
+class TestBuildParser:
+    """Tests for lazy parser construction."""
+
+    def test_builds_only_requested_subcommand(self):
+        """Only the parser for the invoked subcommand should be built."""
+        from subspace.cli import build_parser
+
+        parser = build_parser(["subagent", "run", "task"])
+        top = _subcommand_choices(parser)
+        assert list(top) == ["subagent"]
+        assert list(_subcommand_choices(top["subagent"])) == ["run"]
+
+    def test_unknown_subcommand_builds_all_in_group(self):
+        """An unknown or missing subcommand should build every sibling."""
+        from subspace.cli import build_parser
+
+        parser = build_parser(["command"])
+        top = _subcommand_choices(parser)
+        assert list(top) == ["command"]
+        assert list(_subcommand_choices(top["command"])) == ["get", "list", "show"]
+
+    def test_top_level_help_builds_everything(self):
+        """Top-level help should list every command."""
+        from subspace.cli import build_parser
+
+        parser = build_parser(["-h"])
+        assert list(_subcommand_choices(parser)) == ["setup", "subagent", "command"]
+
+    def test_parses_lazily_built_arguments(self):
+        """Arguments of the lazily built parser should parse normally."""
+        from subspace.cli import build_parser, cmd_command_get
+
+        argv = ["command", "get", "/deploy", "backend", "--output", "json"]
+        args = build_parser(argv).parse_args(argv)
+        assert args.func is cmd_command_get
+        assert args.command == "/deploy"
+        assert args.args == ["backend"]
+        assert args.output == "json"
+
+    def test_shared_options_from_parent_parsers(self):
+        """Options declared on shared parent parsers should parse on each subcommand."""
+        from subspace.cli import build_parser
+
+        argv = ["subagent", "parallel", "a:b", "--timeout", "5", "--agents-dir", "x"]
+        args = build_parser(argv).parse_args(argv)
+        assert args.timeout == 5
+        assert args.agents_dir == "x"
+        assert args.output == "text"
+        assert args.debug is False
+        assert args.max_parallel is None
+
+    def test_command_get_option_order(self):
+        """command get lists --output before the shared options, as it always has."""
+        from subspace.cli import build_parser
+
+        argv = ["command", "get", "/deploy"]
+        top = _subcommand_choices(build_parser(argv))
+        get_parser = _subcommand_choices(top["command"])["get"]
+        options = [a.option_strings[0] for a in get_parser._actions if a.option_strings]
+        assert options == ["-h", "--output", "--debug", "--commands-dir"]
+
+    def test_max_parallel_option(self):
+        """subagent parallel should accept --max-parallel."""
+        from subspace.cli import build_parser
+
+        argv = ["subagent", "parallel", "a:b", "c:d", "--max-parallel", "2"]
+        args = build_parser(argv).parse_args(argv)
+        assert args.max_parallel == 2
+        assert args.pairs == ["a:b", "c:d"]
+
+    def test_debug_defaults_to_false_everywhere(self):
+        """Commands without a --debug flag should still expose args.debug."""
+        from subspace.cli import build_parser
+
+        for argv in (["setup"], ["subagent", "list"], ["command", "list"]):
+            assert build_parser(argv).parse_args(argv).debug is False
+
+    def test_untranslated_argparse_restores_gettext(self):
+        """The gettext bypass should only apply inside the context manager."""
+        from subspace.cli import _untranslated_argparse
+
+        original = argparse._, argparse.ngettext
+        with _untranslated_argparse():
+            assert argparse._("usage: ") == "usage: "
+            assert argparse.ngettext("arg", "args", 2) == "args"
+        assert (argparse._, argparse.ngettext) == original
+
+    def test_version_fast_path_matches_argparse(self, capsys):
+        """main(['--version']) should print what argparse's version action prints."""
+        from subspace.cli import build_parser, main
+
+        assert main(["--version"]) == 0
+        fast = capsys.readouterr().out
+
+        with pytest.raises(SystemExit):
+            build_parser(["--version"]).parse_args(["--version"])
+        assert capsys.readouterr().out == fast
+
+
+class TestSetup:
+    """Tests for the setup command."""
+
+    def test_integration_content_is_packaged(self):
+        """The AGENTS.md integration text should ship as package data."""
+        from importlib.resources import files
+        from subspace.cli import CODEX_INTEGRATION_MARKER
+
+        content = files("subspace").joinpath("data/codex_integration.md").read_text(encoding="utf-8")
+        assert content.startswith(CODEX_INTEGRATION_MARKER)
+
+    def test_setup_is_idempotent(self, tmp_path, monkeypatch):
+        """Running setup twice should install the integration only once."""
+        from subspace.cli import CODEX_INTEGRATION_MARKER, cmd_setup
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        agents_file = tmp_path / ".codex" / "AGENTS.md"
+        agents_file.parent.mkdir()
+        agents_file.write_text("# My instructions\n")
+
+        args = argparse.Namespace(skip_check=False)
+        cmd_setup(args)
+        cmd_setup(args)
+
+        content = agents_file.read_text()
+        assert content.startswith("# My instructions\n")
+        assert content.count(CODEX_INTEGRATION_MARKER) == 1
+
+    def test_file_contains(self, tmp_path):
+        """The marker search should find the needle anywhere in the file."""
+        from subspace.cli import _file_contains
+
+        path = tmp_path / "AGENTS.md"
+        path.write_text("x" * 10000 + "## Marker" + "y" * 10)
+
+        with path.open("rb") as f:
+            assert _file_contains(f, "## Marker")
+            assert not _file_contains(f, "## Missing")
+
+    def test_file_contains_empty_file(self, tmp_path):
+        """An empty file never contains the needle."""
+        from subspace.cli import _file_contains
+
+        path = tmp_path / "AGENTS.md"
+        path.touch()
+
+        with path.open("rb") as f:
+            assert not _file_contains(f, "## Marker")
+
+    def test_setup_creates_agents_file(self, tmp_path, monkeypatch):
+        """Setup should create AGENTS.md when it does not exist yet."""
+        from subspace.cli import CODEX_INTEGRATION_MARKER, cmd_setup
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        cmd_setup(argparse.Namespace(skip_check=False))
+
+        content = (tmp_path / ".codex" / "AGENTS.md").read_text(encoding="utf-8")
+        assert CODEX_INTEGRATION_MARKER in content
+
+    def test_skip_check_does_not_scan_path(self, tmp_path, monkeypatch):
+        """--skip-check should succeed without looking up codex on PATH."""
+        from subspace import cli
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.setattr(cli, "_find_codex", lambda: pytest.fail("PATH was scanned"))
+
+        assert cli.cmd_setup(argparse.Namespace(skip_check=True)) == 0
+
+    def test_find_codex_rescans_when_path_changes(self, tmp_path, monkeypatch):
+        """The cached codex lookup should be keyed on PATH."""
+        from subspace.cli import _find_codex
+
+        codex = tmp_path / "codex"
+        codex.write_text("#!/bin/sh\n")
+        codex.chmod(0o755)
+
+        monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+        assert _find_codex() is None
+
+        monkeypatch.setenv("PATH", str(tmp_path))
+        assert _find_codex() == str(codex)
+
+
+class TestListOutput:
+    """Tests for the list table output."""
+
+    def test_agent_table(self, tmp_path, capsys):
+        """Agent list should print a header, a rule, and one row per agent."""
+        from subspace.cli import cmd_list
+
+        (tmp_path / "coder.md").write_text("Body")
+        (tmp_path / "tdd-agent.md").write_text("Body")
+
+        args = argparse.Namespace(agents_dir=str(tmp_path), output="text")
+        assert cmd_list(args) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split() == ["NAME", "SOURCE", "TYPE"]
+        assert lines[1] == "-" * 80
+        assert [line.split()[0] for line in lines[2:]] == ["coder", "tdd-agent"]
+        assert all(line.endswith("override") for line in lines[2:])
+
+    def test_command_table_truncates_description(self, tmp_path, capsys):
+        """Long command descriptions should be truncated to 30 characters."""
+        from subspace.cli import cmd_command_list
+
+        (tmp_path / "deploy.md").write_text("---\ndescription: " + "d" * 40 + "\n---\nBody")
+
+        args = argparse.Namespace(commands_dir=str(tmp_path), output="text")
+        assert cmd_command_list(args) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split() == ["COMMAND", "SOURCE", "DESCRIPTION"]
+        assert lines[2].split() == ["/deploy", "override", "d" * 27 + "..."]
+
+
+class TestHeadLines:
+    """Tests for the show preview helper."""
+
+    def test_short_text_returned_whole(self):
+        """Text with at most n lines should be returned unchanged."""
+        from subspace.cli import _head_lines
+
+        assert _head_lines("a\nb\nc", 3) == ("a\nb\nc", 0)
+        assert _head_lines("", 3) == ("", 0)
+
+    def test_counts_remaining_lines(self):
+        """Lines beyond n should be counted, matching split('\\n')."""
+        from subspace.cli import _head_lines
+
+        text = "\n".join(str(i) for i in range(120))
+        head, remaining = _head_lines(text, 50)
+        lines = text.split("\n")
+        assert head == "\n".join(lines[:50])
+        assert remaining == len(lines) - 50
+
+    def test_one_line_over(self):
+        """A single extra line should be reported as one more line."""
+        from subspace.cli import _head_lines
+
+        assert _head_lines("a\nb\nc", 2) == ("a\nb", 1)
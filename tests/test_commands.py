@@ -1,106 +1,80 @@
 """Tests for subspace.core.commands module."""
 
-import pytest
-from pathlib import Path
-import tempfile
+import dataclasses
 import os
+from pathlib import Path
 
+import pytest
 
-class TestValidateCommandName:
-    """Tests for command name validation."""
-
-    def test_valid_simple_name(self):
-        """Simple alphanumeric names should be valid."""
-        from subspace.core.commands import validate_command_name
-
-        assert validate_command_name("quick_tasks") == "quick_tasks"
-        assert validate_command_name("deploy") == "deploy"
-        assert validate_command_name("test123") == "test123"
-
-    def test_valid_name_with_slash(self):
-        """Names with leading slash should be normalized."""
-        from subspace.core.commands import validate_command_name
-
-        assert validate_command_name("/quick_tasks") == "quick_tasks"
-        assert validate_command_name("/deploy") == "deploy"
-
-    def test_valid_name_with_hyphen(self):
-        """Names with hyphens should be valid."""
-        from subspace.core.commands import validate_command_name
-
-        assert validate_command_name("quick-tasks") == "quick-tasks"
-        assert validate_command_name("/my-command") == "my-command"
-
-    def test_valid_name_with_underscore(self):
-        """Names with underscores should be valid."""
-        from subspace.core.commands import validate_command_name
-
-        assert validate_command_name("quick_tasks") == "quick_tasks"
-        assert validate_command_name("/my_command") == "my_command"
-
-    def test_empty_name_raises(self):
-        """Empty names should raise ValueError."""
-        from subspace.core.commands import validate_command_name
-
-        with pytest.raises(ValueError, match="cannot be empty"):
-            validate_command_name("")
-
-    def test_only_slash_raises(self):
-        """Just '/' should raise ValueError."""
-        from subspace.core.commands import validate_command_name
-
-        with pytest.raises(ValueError, match="cannot be just"):
-            validate_command_name("/")
-
-    def test_name_starting_with_hyphen_raises(self):
-        """Names starting with hyphen should raise ValueError."""
-        from subspace.core.commands import validate_command_name
-
-        with pytest.raises(ValueError, match="cannot start with hyphen"):
-            validate_command_name("-invalid")
-
-    def test_invalid_characters_raises(self):
-        """Names with invalid characters should raise ValueError."""
-        from subspace.core.commands import validate_command_name
-
-        with pytest.raises(ValueError, match="must contain only"):
-            validate_command_name("../path/traversal")
-
-        with pytest.raises(ValueError, match="must contain only"):
-            validate_command_name("command with spaces")
-
-    def test_valid_namespaced_command(self):
-        """Namespaced commands (namespace:command) should be valid."""
-        from subspace.core.commands import validate_command_name
-
-        assert validate_command_name("subspace:sweep") == "subspace:sweep"
-        assert validate_command_name("/subspace:sweep") == "subspace:sweep"
-        assert validate_command_name("my-namespace:my-command") == "my-namespace:my-command"
-
-    def test_invalid_namespaced_command(self):
-        """Invalid namespaced commands should raise ValueError."""
-        from subspace.core.commands import validate_command_name
-
-        # Multiple colons
-        with pytest.raises(ValueError):
-            validate_command_name("a:b:c")
-
-        # Empty namespace or command
-        with pytest.raises(ValueError):
-            validate_command_name(":command")
-
-        with pytest.raises(ValueError):
-            validate_command_name("namespace:")
+from subspace.core import commands, frontmatter
+from subspace.core.commands import (
+    FRONTMATTER_READ_SIZE,
+    CommandEntry,
+    CommandSource,
+    compile_interpolation,
+    find_command,
+    get_command_sources,
+    interpolate_arguments,
+    invalidate_source_cache,
+    list_all_commands,
+    load_command_prompt,
+    parse_frontmatter,
+    read_frontmatter,
+    render_interpolation,
+    split_frontmatter,
+    strip_frontmatter,
+    validate_command_name,
+)
+
+
+def _mk(root, name="test", source_type="project", priority=1):
+    """Return a CommandSource for root/.claude/commands, creating the directory."""
+    commands_dir = root / ".claude" / "commands"
+    commands_dir.mkdir(parents=True, exist_ok=True)
+    return CommandSource(name, commands_dir, source_type, priority)
 
-    def test_namespaced_command_no_leading_hyphen(self):
-        """Namespaced command parts cannot start with hyphen."""
-        from subspace.core.commands import validate_command_name
 
-        with pytest.raises(ValueError, match="cannot start with hyphen"):
-            validate_command_name("-namespace:command")
+class TestValidateCommandName:
+    """Tests for command name validation."""
 
-        with pytest.raises(ValueError, match="cannot start with hyphen"):
-            validate_command_name("namespace:-command")
+    @pytest.mark.parametrize("raw, expected", [
+        ("quick_tasks", "quick_tasks"),
+        ("deploy", "deploy"),
+        ("test123", "test123"),
+        # Leading slash is stripped
+        ("/quick_tasks", "quick_tasks"),
+        ("/deploy", "deploy"),
+        # Hyphens and underscores
+        ("quick-tasks", "quick-tasks"),
+        ("/my-command", "my-command"),
+        ("/my_command", "my_command"),
+        # Namespaced (namespace:command)
+        ("subspace:sweep", "subspace:sweep"),
+        ("/subspace:sweep", "subspace:sweep"),
+        ("my-namespace:my-command", "my-namespace:my-command"),
+    ])
+    def test_valid_names(self, raw, expected):
+        """Valid names should be returned normalized."""
+        assert validate_command_name(raw) == expected
+
+    @pytest.mark.parametrize("raw, message", [
+        ("", "cannot be empty"),
+        ("/", "cannot be just"),
+        ("-invalid", "cannot start with hyphen"),
+        ("../path/traversal", "must contain only"),
+        ("command with spaces", "must contain only"),
+        ("deploy\n", "must contain only"),
+        # Namespaced: multiple colons, empty parts, leading hyphens
+        ("a:b:c", None),
+        (":command", None),
+        ("namespace:", None),
+        ("-namespace:command", "cannot start with hyphen"),
+        ("namespace:-command", "cannot start with hyphen"),
+    ])
+    def test_invalid_names_raise(self, raw, message):
+        """Invalid names should raise ValueError with a matching reason."""
+        with pytest.raises(ValueError, match=message):
+            validate_command_name(raw)
 
 
 class TestParseFrontmatter:
@@ -108,8 +82,6 @@ class TestParseFrontmatter:
 
     def test_parse_simple_frontmatter(self):
         """Should parse simple key-value frontmatter."""
-        from subspace.core.commands import parse_frontmatter
-
         content = """---
 description: A test command
 author: Test Author
@@ -123,8 +95,6 @@ Command body here.
 
     def test_parse_quoted_values(self):
         """Should strip quotes from values."""
-        from subspace.core.commands import parse_frontmatter
-
         content = """---
 description: "A quoted description"
 name: 'single quoted'
@@ -136,18 +106,25 @@ Body.
         assert result["description"] == "A quoted description"
         assert result["name"] == "single quoted"
 
+    def test_unpaired_quotes_are_kept(self):
+        """Only a matching pair of surrounding quotes should be removed."""
+        content = """---
+description: Review the users' settings
+title: '"Inner" quotes'
+---
+"""
+        result = parse_frontmatter(content)
+        assert result["description"] == "Review the users' settings"
+        assert result["title"] == '"Inner" quotes'
+
     def test_no_frontmatter(self):
         """Should return empty dict if no frontmatter."""
-        from subspace.core.commands import parse_frontmatter
-
         content = "Just some markdown content."
         result = parse_frontmatter(content)
         assert result == {}
 
     def test_incomplete_frontmatter(self):
         """Should return empty dict if frontmatter is not closed."""
-        from subspace.core.commands import parse_frontmatter
-
         content = """---
 description: Incomplete
 This is not closed properly.
@@ -161,8 +138,6 @@ class TestStripFrontmatter:
 
     def test_strip_frontmatter(self):
         """Should remove frontmatter and return body."""
-        from subspace.core.commands import strip_frontmatter
-
         content = """---
 description: Test
 ---
@@ -174,20 +149,80 @@ Command body here.
 
     def test_no_frontmatter_unchanged(self):
         """Should return content unchanged if no frontmatter."""
-        from subspace.core.commands import strip_frontmatter
-
         content = "Just content."
         result = strip_frontmatter(content)
         assert result == "Just content."
 
 
+class TestSplitFrontmatter:
+    """Tests for single-pass frontmatter splitting."""
+
+    def test_matches_parse_and_strip(self):
+        """Should agree with parse_frontmatter and strip_frontmatter."""
+        content = """---
+description: Test
+argument-hint: "[env]"
+---
+
+Command body here.
+"""
+        assert split_frontmatter(content) == (
+            parse_frontmatter(content),
+            strip_frontmatter(content),
+        )
+
+    def test_no_frontmatter(self):
+        """Should return an empty dict and the content unchanged."""
+        assert split_frontmatter("Just content.") == ({}, "Just content.")
+
+
+class TestPrecompiledPatterns:
+    """Hot paths should go through the module-level compiled patterns."""
+
+    def _spy(self, monkeypatch, module, name):
+        """Replace module.name with a spy; return the list of methods called on it."""
+        calls = []
+        pattern = getattr(module, name)
+
+        class Spy:
+            def __getattr__(self, attr):
+                calls.append(attr)
+                return getattr(pattern, attr)
+
+        monkeypatch.setattr(module, name, Spy())
+        return calls
+
+    def test_frontmatter(self, monkeypatch):
+        """Frontmatter parsing uses FRONTMATTER_PATTERN."""
+        calls = self._spy(monkeypatch, frontmatter, "FRONTMATTER_PATTERN")
+
+        content = "---\ndescription: Test\n---\nBody\n"
+        assert parse_frontmatter(content) == {"description": "Test"}
+        assert strip_frontmatter(content) == "Body\n"
+        assert split_frontmatter(content)[1] == "Body\n"
+        assert calls == ["match", "sub", "match"]
+
+    def test_interpolation(self, monkeypatch):
+        """Compiling a prompt uses ARGUMENT_PATTERN."""
+        compile_interpolation.cache_clear()
+        calls = self._spy(monkeypatch, commands, "ARGUMENT_PATTERN")
+
+        assert interpolate_arguments("Run $1 with $@", ["a", "b"]) == "Run a with a b"
+        assert calls == ["split"]
+
+    def test_command_name_validation(self, monkeypatch):
+        """Valid names need a single VALID_COMMAND_PATTERN match."""
+        calls = self._spy(monkeypatch, commands, "VALID_COMMAND_PATTERN")
+
+        assert validate_command_name("/ns:cmd") == "ns:cmd"
+        assert calls == ["fullmatch"]
+
+
 class TestInterpolateArguments:
     """Tests for argument interpolation."""
 
     def test_interpolate_positional_args(self):
         """Should replace $1, $2, etc. with arguments."""
-        from subspace.core.commands import interpolate_arguments
-
         prompt = "Deploy $1 to $2 environment"
         args = ["backend", "production"]
         result = interpolate_arguments(prompt, args)
@@ -195,8 +230,6 @@ class TestInterpolateArguments:
 
     def test_interpolate_all_args(self):
         """Should replace $@ with all arguments."""
-        from subspace.core.commands import interpolate_arguments
-
         prompt = "Run tests for: $@"
         args = ["auth", "users", "api"]
         result = interpolate_arguments(prompt, args)
@@ -204,281 +237,388 @@ class TestInterpolateArguments:
 
     def test_no_interpolation_without_args(self):
         """Should return prompt unchanged if no args."""
-        from subspace.core.commands import interpolate_arguments
-
         prompt = "Simple prompt with $1"
         result = interpolate_arguments(prompt, [])
         assert result == "Simple prompt with $1"
 
     def test_partial_interpolation(self):
         """Should only replace args that are provided."""
-        from subspace.core.commands import interpolate_arguments
-
         prompt = "Deploy $1 to $2 with $3"
         args = ["backend", "staging"]
         result = interpolate_arguments(prompt, args)
         assert result == "Deploy backend to staging with $3"
 
+    def test_interpolate_multi_digit_placeholder(self):
+        """$10 should use the tenth argument, not $1 followed by '0'."""
+        args = [f"a{i}" for i in range(1, 11)]
+        result = interpolate_arguments("$1 $10", args)
+        assert result == "a1 a10"
 
-class TestCommandDiscovery:
-    """Tests for command discovery from directories."""
+    def test_interpolate_does_not_resubstitute_values(self):
+        """Argument values containing placeholders should be inserted verbatim."""
+        result = interpolate_arguments("$1 and $2", ["$2", "second"])
+        assert result == "$2 and second"
 
-    def test_find_command_in_project(self):
-        """Should find command in project directory."""
-        from subspace.core.commands import CommandSource, find_command
+    def test_compiled_prompt_renders_many_arg_sets(self):
+        """A compiled prompt can be rendered repeatedly with different args."""
+        parts = compile_interpolation("Deploy $1 to $2 ($@) $0")
+        assert parts == ("Deploy ", "1", " to ", "2", " (", "@", ") ", "0", "")
+        assert compile_interpolation("Deploy $1 to $2 ($@) $0") is parts
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create command file
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            commands_dir.mkdir(parents=True)
-            (commands_dir / "test_cmd.md").write_text("Test command content")
+        assert render_interpolation(parts, ["api", "prod"]) == "Deploy api to prod (api prod) $0"
+        assert render_interpolation(parts, ["web"]) == "Deploy web to $2 (web) $0"
 
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            result = find_command("test_cmd", sources)
+    def test_huge_index_is_left_as_written(self):
+        """Placeholders with more digits than int() converts stay literal text."""
+        placeholder = "$" + "9" * 5000
+        result = interpolate_arguments(f"Run $1 {placeholder}", ["a"])
+        assert result == f"Run a {placeholder}"
 
-            assert result is not None
-            path, source = result
-            assert path.name == "test_cmd.md"
-            assert source.name == "test"
 
-    def test_find_command_with_slash_prefix(self):
-        """Should find command when name has leading slash."""
-        from subspace.core.commands import CommandSource, find_command
+class TestCommandDiscovery:
+    """Tests for command discovery from directories."""
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            commands_dir.mkdir(parents=True)
-            (commands_dir / "deploy.md").write_text("Deploy content")
+    def test_find_command_in_project(self, cmd_tree):
+        """Should find command in project directory."""
+        sources = [_mk(cmd_tree)]
+        result = find_command("test_cmd", sources)
 
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            result = find_command("/deploy", sources)
+        assert result is not None
+        path, source = result
+        assert path.name == "test_cmd.md"
+        assert source.name == "test"
 
-            assert result is not None
-            path, _ = result
-            assert path.name == "deploy.md"
+    def test_find_command_with_slash_prefix(self, cmd_tree):
+        """Should find command when name has leading slash."""
+        sources = [_mk(cmd_tree)]
+        result = find_command("/deploy", sources)
 
-    def test_command_not_found(self):
-        """Should return None if command not found."""
-        from subspace.core.commands import CommandSource, find_command
+        assert result is not None
+        path, _ = result
+        assert path.name == "deploy.md"
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir)
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            result = find_command("nonexistent", sources)
+    def test_command_not_found(self, cmd_tree):
+        """Should return None if command not found."""
+        sources = [_mk(cmd_tree)]
+        result = find_command("nonexistent", sources)
 
-            assert result is None
+        assert result is None
 
-    def test_priority_ordering(self):
+    def test_priority_ordering(self, cmd_tree):
         """Should respect source priority (lower = higher priority)."""
-        from subspace.core.commands import CommandSource, find_command
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create two command directories
-            project_dir = Path(tmpdir) / "project" / ".claude" / "commands"
-            user_dir = Path(tmpdir) / "user" / ".claude" / "commands"
-            project_dir.mkdir(parents=True)
-            user_dir.mkdir(parents=True)
-
-            # Same command in both
-            (project_dir / "deploy.md").write_text("Project deploy")
-            (user_dir / "deploy.md").write_text("User deploy")
-
-            sources = [
-                CommandSource("project", project_dir, "project", 1),
-                CommandSource("user", user_dir, "user", 2),
-            ]
-            result = find_command("deploy", sources)
-
-            assert result is not None
-            path, source = result
-            assert source.name == "project"  # Higher priority (lower number)
-
-    def test_find_namespaced_command(self):
-        """Should find namespaced command in subdirectory."""
-        from subspace.core.commands import CommandSource, find_command
+        # deploy.md exists in both directories
+        sources = [_mk(cmd_tree, "project"), _mk(cmd_tree / "home", "user", "user", 2)]
+        result = find_command("deploy", sources)
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            namespace_dir = commands_dir / "subspace"
-            namespace_dir.mkdir(parents=True)
-            (namespace_dir / "sweep.md").write_text("Sweep command content")
+        assert result is not None
+        path, source = result
+        assert source.name == "project"  # Higher priority (lower number)
 
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            result = find_command("subspace:sweep", sources)
+    def test_find_namespaced_command(self, cmd_tree):
+        """Should find namespaced command in subdirectory."""
+        sources = [_mk(cmd_tree)]
+        result = find_command("subspace:sweep", sources)
 
-            assert result is not None
-            path, source = result
-            assert path.name == "sweep.md"
-            assert path.parent.name == "subspace"
+        assert result is not None
+        path, source = result
+        assert path.name == "sweep.md"
+        assert path.parent.name == "subspace"
 
-    def test_find_namespaced_command_with_slash(self):
+    def test_find_namespaced_command_with_slash(self, cmd_tree):
         """Should find namespaced command with leading slash."""
-        from subspace.core.commands import CommandSource, find_command
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            namespace_dir = commands_dir / "myns"
-            namespace_dir.mkdir(parents=True)
-            (namespace_dir / "cmd.md").write_text("Content")
-
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            result = find_command("/myns:cmd", sources)
-
-            assert result is not None
-            path, _ = result
-            assert path.name == "cmd.md"
+        sources = [_mk(cmd_tree)]
+        result = find_command("/subspace:clean", sources)
+
+        assert result is not None
+        path, _ = result
+        assert path.name == "clean.md"
+
+    def test_find_command_index_is_refreshed_by_invalidate(self, tmp_path):
+        """Commands added after a lookup should be found once caches are cleared."""
+        source = _mk(tmp_path)
+        commands_dir = source.path
+        (commands_dir / "first.md").write_text("First")
+        sources = [source]
+        assert find_command("first", sources) is not None
+
+        (commands_dir / "second.md").write_text("Second")
+        invalidate_source_cache()
+        result = find_command("second", sources)
+        assert result is not None
+        assert result[0] == commands_dir / "second.md"
+
+    def test_find_command_added_after_lookup(self, tmp_path):
+        """Commands added after the index was built should be found without invalidating."""
+        source = _mk(tmp_path)
+        commands_dir = source.path
+        (commands_dir / "first.md").write_text("First")
+        sources = [source]
+        assert find_command("first", sources) is not None
+        assert find_command("second", sources) is None
+
+        (commands_dir / "second.md").write_text("Second")
+        (commands_dir / "ns").mkdir()
+        (commands_dir / "ns" / "third.md").write_text("Third")
+        assert find_command("second", sources)[0] == commands_dir / "second.md"
+        assert find_command("ns:third", sources)[0] == commands_dir / "ns" / "third.md"
+
+    def test_find_command_removed_after_lookup(self, tmp_path):
+        """A command deleted after the index was built falls through to later sources."""
+        project = _mk(tmp_path / "project", "project")
+        user = _mk(tmp_path / "user", "user", "user", 2)
+        (project.path / "deploy.md").write_text("Project deploy")
+        (user.path / "deploy.md").write_text("User deploy")
+        (project.path / "solo.md").write_text("Solo")
+        sources = [project, user]
+        assert find_command("deploy", sources)[1] is project
+        assert find_command("solo", sources) is not None
+
+        (project.path / "deploy.md").unlink()
+        (project.path / "solo.md").unlink()
+        assert find_command("deploy", sources) == (user.path / "deploy.md", user)
+        assert find_command("solo", sources) is None
 
 
 class TestListAllCommands:
     """Tests for listing all commands."""
 
-    def test_list_all_commands(self):
+    def test_list_all_commands(self, tmp_path):
         """Should list all commands from all sources."""
-        from subspace.core.commands import CommandSource, list_all_commands
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            commands_dir.mkdir(parents=True)
-
-            (commands_dir / "cmd1.md").write_text("""---
-description: First command
----
-
-Body 1
-""")
-            (commands_dir / "cmd2.md").write_text("Body 2 no frontmatter")
-
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            commands = list_all_commands(sources)
-
-            assert len(commands) == 2
-            names = [c["name"] for c in commands]
-            assert "/cmd1" in names
-            assert "/cmd2" in names
-
-            # Check description from frontmatter
-            cmd1 = next(c for c in commands if c["name"] == "/cmd1")
-            assert cmd1["description"] == "First command"
-
-    def test_list_deduplicates_by_name(self):
+        source = _mk(tmp_path)
+        (source.path / "cmd1.md").write_text("---\ndescription: First command\n---\n\nBody 1\n")
+        (source.path / "cmd2.md").write_text("Body 2 no frontmatter")
+        commands = list_all_commands([source])
+
+        assert len(commands) == 2
+        names = [c.name for c in commands]
+        assert "/cmd1" in names
+        assert "/cmd2" in names
+
+        # Check description from frontmatter
+        cmd1 = next(c for c in commands if c.name == "/cmd1")
+        assert cmd1.description == "First command"
+        cmd2 = next(c for c in commands if c.name == "/cmd2")
+        assert cmd2.description == ""
+
+    def test_list_deduplicates_by_name(self, cmd_tree):
         """Should only include first occurrence of duplicate names."""
-        from subspace.core.commands import CommandSource, list_all_commands
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            project_dir = Path(tmpdir) / "project"
-            user_dir = Path(tmpdir) / "user"
-            project_dir.mkdir(parents=True)
-            user_dir.mkdir(parents=True)
+        sources = [_mk(cmd_tree, "project"), _mk(cmd_tree / "home", "user", "user", 2)]
+        commands = list_all_commands(sources)
 
-            (project_dir / "deploy.md").write_text("Project version")
-            (user_dir / "deploy.md").write_text("User version")
+        deploy_commands = [c for c in commands if c.name == "/deploy"]
+        assert len(deploy_commands) == 1
+        assert deploy_commands[0].source == "project"
 
-            sources = [
-                CommandSource("project", project_dir, "project", 1),
-                CommandSource("user", user_dir, "user", 2),
-            ]
-            commands = list_all_commands(sources)
-
-            deploy_commands = [c for c in commands if c["name"] == "/deploy"]
-            assert len(deploy_commands) == 1
-            assert deploy_commands[0]["source"] == "project"
-
-    def test_list_includes_namespaced_commands(self):
+    def test_list_includes_namespaced_commands(self, cmd_tree):
         """Should list commands from namespace subdirectories."""
-        from subspace.core.commands import CommandSource, list_all_commands
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            commands_dir = Path(tmpdir) / ".claude" / "commands"
-            commands_dir.mkdir(parents=True)
-
-            # Top-level command
-            (commands_dir / "deploy.md").write_text("Deploy")
-
-            # Namespaced commands
-            namespace_dir = commands_dir / "subspace"
-            namespace_dir.mkdir()
-            (namespace_dir / "sweep.md").write_text("Sweep")
-            (namespace_dir / "clean.md").write_text("Clean")
-
-            sources = [CommandSource("test", commands_dir, "project", 1)]
-            commands = list_all_commands(sources)
-
-            names = [c["name"] for c in commands]
-            assert "/deploy" in names
-            assert "/subspace:sweep" in names
-            assert "/subspace:clean" in names
-            assert len(commands) == 3
+        sources = [_mk(cmd_tree)]
+        commands = list_all_commands(sources)
+
+        names = [c.name for c in commands]
+        assert sorted(names) == [
+            "/cmd1", "/cmd2", "/deploy", "/subspace:clean", "/subspace:sweep", "/test_cmd",
+        ]
+        sweep = next(c for c in commands if c.name == "/subspace:sweep")
+        assert sweep.namespace == "subspace"
+
+    def test_iter_all_commands_filters_before_reading(self, tmp_path, monkeypatch):
+        """Filtered-out commands should be skipped without reading the file."""
+        read = []
+        original = commands.read_frontmatter
+        monkeypatch.setattr(
+            commands, "read_frontmatter", lambda path: read.append(path) or original(path)
+        )
+
+        source = _mk(tmp_path)
+        commands_dir = source.path
+        (commands_dir / "deploy.md").write_text("---\ndescription: Deploy\n---\n")
+        (commands_dir / "debug.md").write_text("Debug")
+
+        sources = [source]
+        entries = commands.iter_all_commands(sources, lambda name: name.startswith("dep"))
+
+        assert [(c.name, c.description) for c in entries] == [("/deploy", "Deploy")]
+        assert read == [str(commands_dir / "deploy.md")]
+
+    def test_entry_to_dict_matches_json_shape(self):
+        """Only namespaced entries should carry a namespace key."""
+        simple = CommandEntry("/deploy", "/c/deploy.md", "test", "project", "Deploy")
+        assert simple.to_dict() == {
+            "name": "/deploy",
+            "path": "/c/deploy.md",
+            "source": "test",
+            "source_type": "project",
+            "description": "Deploy",
+        }
+
+        namespaced = CommandEntry("/ns:sweep", "/c/ns/sweep.md", "test", "project", "", "ns")
+        assert namespaced.to_dict()["namespace"] == "ns"
+
+    def test_list_reads_frontmatter_beyond_head(self, tmp_path):
+        """Frontmatter longer than the initial read should still be parsed."""
+        source = _mk(tmp_path)
+        commands_dir = source.path
+        padding = "x" * FRONTMATTER_READ_SIZE
+        (commands_dir / "long.md").write_text(
+            f"---\nnotes: {padding}\ndescription: Late key\n---\n\nBody\n"
+        )
+        (commands_dir / "plain.md").write_text("Body " * FRONTMATTER_READ_SIZE)
+
+        commands = {c.name: c for c in list_all_commands([source])}
+
+        assert commands["/long"].description == "Late key"
+        assert commands["/plain"].description == ""
+
+    def test_read_frontmatter_head_cut_mid_character(self, tmp_path):
+        """A multibyte character split by the head read should not matter."""
+        header = b"---\ndescription: Cafe\n---\n"
+        padding = b"a" * (FRONTMATTER_READ_SIZE - len(header) - 1)
+        path = tmp_path / "cut.md"
+        path.write_bytes(header + padding + "é".encode() + b"\nBody\n")
+
+        assert read_frontmatter(str(path)) == {"description": "Cafe"}
+
+    @pytest.mark.parametrize("size", [100, FRONTMATTER_READ_SIZE * 2])
+    def test_read_frontmatter_decodes_strictly(self, tmp_path, size):
+        """Invalid UTF-8 should fail the same way whether or not the file fits the head."""
+        content = b"---\ndescription: \xff\n---\n"
+        path = tmp_path / "bad.md"
+        path.write_bytes(content + b"a" * (size - len(content)))
+
+        with pytest.raises(UnicodeDecodeError):
+            read_frontmatter(str(path))
+
+    def test_list_follows_symlinked_commands(self, tmp_path):
+        """Symlinked command files should be listed like regular files."""
+        source = _mk(tmp_path)
+        target = tmp_path / "shared.md"
+        target.write_text("---\ndescription: Shared\n---\nBody\n")
+        (source.path / "linked.md").symlink_to(target)
+
+        commands = list_all_commands([source])
+
+        assert [c.name for c in commands] == ["/linked"]
+        assert commands[0].description == "Shared"
 
 
 class TestLoadCommandPrompt:
     """Tests for loading command prompt text."""
 
-    def test_load_command_prompt(self):
+    def test_load_command_prompt(self, tmp_path):
         """Should load prompt text without frontmatter."""
-        from subspace.core.commands import load_command_prompt
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cmd_file = Path(tmpdir) / "test.md"
-            cmd_file.write_text("""---
+        cmd_file = tmp_path / "test.md"
+        cmd_file.write_text("""---
 description: Test
 ---
 
 This is the prompt text.
 Do something useful.
 """)
-            result = load_command_prompt(cmd_file)
-            assert "This is the prompt text." in result
-            assert "Do something useful." in result
-            assert "description:" not in result
+        result = load_command_prompt(cmd_file)
+        assert "This is the prompt text." in result
+        assert "Do something useful." in result
+        assert "description:" not in result
 
-    def test_load_command_prompt_no_frontmatter(self):
+    def test_load_command_prompt_no_frontmatter(self, tmp_path):
         """Should load full content if no frontmatter."""
-        from subspace.core.commands import load_command_prompt
+        cmd_file = tmp_path / "test.md"
+        cmd_file.write_text("Just a simple prompt.")
+
+        result = load_command_prompt(cmd_file)
+        assert result == "Just a simple prompt."
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cmd_file = Path(tmpdir) / "test.md"
-            cmd_file.write_text("Just a simple prompt.")
+    def test_load_command_prompt_sees_edits(self, tmp_path):
+        """Cached prompts should be re-read once the file changes."""
+        cmd_file = tmp_path / "test.md"
+        cmd_file.write_text("First version.")
+        assert load_command_prompt(cmd_file) == "First version."
+        assert load_command_prompt(cmd_file) == "First version."
 
-            result = load_command_prompt(cmd_file)
-            assert result == "Just a simple prompt."
+        cmd_file.write_text("Second version, longer.")
+        st = cmd_file.stat()
+        os.utime(cmd_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert load_command_prompt(cmd_file) == "Second version, longer."
 
 
 class TestCommandSources:
     """Tests for get_command_sources."""
 
-    def test_get_command_sources_finds_project_dirs(self):
+    def test_get_command_sources_finds_project_dirs(self, tmp_path):
         """Should find command directories in project root."""
-        from subspace.core.commands import get_command_sources
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            project_root = Path(tmpdir)
-            claude_commands = project_root / ".claude" / "commands"
-            codex_prompts = project_root / ".codex" / "prompts"
-            claude_commands.mkdir(parents=True)
-            codex_prompts.mkdir(parents=True)
-
-            # Change to project directory
-            old_cwd = os.getcwd()
-            try:
-                os.chdir(project_root)
-                sources = get_command_sources(project_root)
-
-                source_names = [s.name for s in sources]
-                assert "claude_project" in source_names
-                assert "codex_project" in source_names
-            finally:
-                os.chdir(old_cwd)
-
-    def test_get_command_sources_empty_if_no_dirs(self):
+        project_root = tmp_path
+        claude_commands = project_root / ".claude" / "commands"
+        codex_prompts = project_root / ".codex" / "prompts"
+        claude_commands.mkdir(parents=True)
+        codex_prompts.mkdir(parents=True)
+
+        # project_root is explicit, so the working directory doesn't matter
+        sources = {s.name: s for s in get_command_sources(project_root)}
+        assert sources["claude_project"].path == claude_commands
+        assert sources["codex_project"].path == codex_prompts
+
+    def test_get_command_sources_empty_if_no_dirs(self, tmp_path):
         """Should return empty list if no command directories exist."""
-        from subspace.core.commands import get_command_sources
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Don't create any command directories
-            sources = get_command_sources(Path(tmpdir))
-            # Filter to only project sources (user dirs might exist)
-            project_sources = [s for s in sources if s.source_type == "project"]
-            assert len(project_sources) == 0
+        # Don't create any command directories
+        sources = get_command_sources(tmp_path)
+        # Filter to only project sources (user dirs might exist)
+        project_sources = [s for s in sources if s.source_type == "project"]
+        assert len(project_sources) == 0
+
+    def test_get_command_sources_is_memoized(self, tmp_path, monkeypatch):
+        """Repeated calls within SOURCE_CACHE_TTL should reuse the cached probe."""
+        from subspace.core import cache
+
+        clock = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+
+        project_root = tmp_path
+        get_sources = commands.get_command_sources
+        assert get_sources(project_root) == get_sources(project_root)
+
+        # Directories created after the first probe are not seen until
+        # the TTL window moves on.
+        (project_root / ".claude" / "commands").mkdir(parents=True)
+        names = [s.name for s in get_sources(project_root)]
+        assert "claude_project" not in names
+
+        clock[0] += commands.SOURCE_CACHE_TTL
+        names = [s.name for s in get_sources(project_root)]
+        assert "claude_project" in names
+
+    def test_get_command_sources_ttl_counts_from_probe(self, tmp_path, monkeypatch):
+        """A probe should be reused for a full TTL, wherever the call lands in time."""
+        from subspace.core import cache
+
+        clock = [1000.9]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+
+        project_root = tmp_path
+        commands.get_command_sources(project_root)
+        (project_root / ".claude" / "commands").mkdir(parents=True)
+
+        clock[0] += commands.SOURCE_CACHE_TTL / 2
+        names = [s.name for s in commands.get_command_sources(project_root)]
+        assert "claude_project" not in names
+
+        clock[0] += commands.SOURCE_CACHE_TTL / 2
+        names = [s.name for s in commands.get_command_sources(project_root)]
+        assert "claude_project" in names
+
+    def test_sources_are_immutable(self):
+        """Cached sources are shared between callers, so they must be frozen."""
+        source = CommandSource("test", Path("/tmp"), "project", 1)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            source.priority = 0
+
+    def test_invalidate_source_cache(self, tmp_path):
+        """invalidate_source_cache should make new directories visible at once."""
+        project_root = tmp_path
+        get_command_sources(project_root)
+
+        (project_root / ".codex" / "prompts").mkdir(parents=True)
+        invalidate_source_cache()
+        names = [s.name for s in get_command_sources(project_root)]
+        assert "codex_project" in names
 
 
 class TestCliModuleImportsCommands:
@@ -1,8 +1,26 @@
 """Tests for subspace.core.runner module."""
 
+import asyncio
+import io
+import json
+import os
+import stat
+import string
+import sys
+from pathlib import Path
+
 import pytest
 
+from subspace.core import runner
 from subspace.core.runner import (
+    SUBAGENT_GUIDANCE,
+    AgentMessageExtractor,
+    _codex_env,
+    _run_codex_async,
+    _run_codex_sync,
+    _run_parallel_async,
+    _safe_copy_file,
+    encode_payload,
     extract_agent_messages,
     validate_agent_name,
     parse_agent_task_pair,
@@ -11,51 +29,77 @@ from subspace.core.runner import (
 )
 
 
+def _fake_codex(directory, script):
+    """Write an executable fake codex running the given sh script; return its path."""
+    codex = directory / "codex"
+    codex.write_text("#!/bin/sh\n" + script)
+    codex.chmod(codex.stat().st_mode | stat.S_IEXEC)
+    return str(codex)
+
+
+def _printing_codex(directory, jsonl):
+    """Create a fake codex that consumes stdin and prints jsonl."""
+    events = directory / "events.jsonl"
+    events.write_text(jsonl)
+    return _fake_codex(directory, f"cat > /dev/null\ncat '{events}'\n")
+
+
 class TestValidateAgentName:
     """Tests for agent name validation (security)."""
 
-    def test_valid_names(self):
+    @pytest.mark.parametrize("name", [
+        "tdd-agent",
+        "coder",
+        "web_search_researcher",
+        "agent123",
+        "MyAgent",
+        "a",
+    ])
+    def test_valid_names(self, name):
         """Valid agent names should pass validation."""
-        valid_names = [
-            "tdd-agent",
-            "coder",
-            "web_search_researcher",
-            "agent123",
-            "MyAgent",
-            "a",
-        ]
-        for name in valid_names:
-            validate_agent_name(name)  # Should not raise
+        validate_agent_name(name)  # Should not raise
 
     def test_empty_name_rejected(self):
         """Empty names should be rejected."""
         with pytest.raises(ValueError, match="cannot be empty"):
             validate_agent_name("")
 
-    def test_path_traversal_rejected(self):
+    @pytest.mark.parametrize("name", [
+        "../etc/passwd",
+        "..\\windows\\system32",
+        "agent/../secret",
+        "./hidden",
+    ])
+    def test_path_traversal_rejected(self, name):
         """Path traversal attempts should be rejected."""
-        dangerous_names = [
-            "../etc/passwd",
-            "..\\windows\\system32",
-            "agent/../secret",
-            "./hidden",
-        ]
-        for name in dangerous_names:
-            with pytest.raises(ValueError, match="must contain only"):
-                validate_agent_name(name)
-
-    def test_special_chars_rejected(self):
+        with pytest.raises(ValueError, match="must contain only"):
+            validate_agent_name(name)
+
+    @pytest.mark.parametrize("name", [
+        "agent name",  # space
+        "agent@name",  # @
+        "agent/name",  # /
+        "agent.name",  # .
+        "agent:name",  # :
+        "agent\n",  # trailing newline
+        "agent\u00e9",  # non-ASCII letter
+    ])
+    def test_special_chars_rejected(self, name):
         """Special characters should be rejected."""
-        invalid_names = [
-            "agent name",  # space
-            "agent@name",  # @
-            "agent/name",  # /
-            "agent.name",  # .
-            "agent:name",  # :
-        ]
-        for name in invalid_names:
-            with pytest.raises(ValueError, match="must contain only"):
+        with pytest.raises(ValueError, match="must contain only"):
+            validate_agent_name(name)
+
+    def test_every_character_classified(self):
+        """Each character below U+0800 is accepted exactly when it is [A-Za-z0-9_-]."""
+        allowed = set(string.ascii_letters + string.digits + "_-")
+        for code in range(0x800):
+            char = chr(code)
+            name = f"a{char}b"
+            if char in allowed:
                 validate_agent_name(name)
+            else:
+                with pytest.raises(ValueError, match="must contain only"):
+                    validate_agent_name(name)
 
     def test_leading_hyphen_rejected(self):
         """Names starting with hyphen should be rejected."""
@@ -63,6 +107,97 @@ class TestValidateAgentName:
             validate_agent_name("-dangerous")
 
 
+class TestSafeCopyFile:
+    """Tests for credential file syncing."""
+
+    def test_copies_then_skips_unchanged(self, tmp_path):
+        """A second copy of an unchanged file is skipped."""
+        src = tmp_path / "auth.json"
+        src.write_text('{"token": "a"}')
+        dst = tmp_path / "out.json"
+
+        assert _safe_copy_file(src, dst) is True
+        assert dst.read_text() == '{"token": "a"}'
+        assert _safe_copy_file(src, dst) is False
+
+    def test_recopies_when_source_changes(self, tmp_path):
+        """A modified source is copied again."""
+        src = tmp_path / "auth.json"
+        src.write_text('{"token": "a"}')
+        dst = tmp_path / "out.json"
+        _safe_copy_file(src, dst)
+
+        src.write_text('{"token": "b"}')
+        st = src.stat()
+        os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert _safe_copy_file(src, dst) is True
+        assert dst.read_text() == '{"token": "b"}'
+        assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+    def test_rejects_symlinks(self, tmp_path):
+        """Symlinked sources are never copied."""
+        real = tmp_path / "real.json"
+        real.write_text("{}")
+        link = tmp_path / "auth.json"
+        link.symlink_to(real)
+        dst = tmp_path / "out.json"
+
+        assert _safe_copy_file(link, dst) is False
+        assert not dst.exists()
+
+
+class TestSetupCodexHome:
+    """Tests for setup_codex_home."""
+
+    def test_resyncs_only_when_sources_change(self, tmp_path, monkeypatch):
+        """Unchanged sources skip the copy step; edited ones are synced again."""
+        home = tmp_path / "home"
+        (home / ".codex").mkdir(parents=True)
+        config = home / ".codex" / "config.toml"
+        config.write_text('model = "a"')
+        workspace = tmp_path / "work"
+        workspace.mkdir()
+        monkeypatch.setattr(Path, "home", lambda: home)
+        monkeypatch.chdir(workspace)
+        runner._sync_codex_home.cache_clear()
+
+        copies = []
+        real_copy = runner._safe_copy_file
+
+        def recording_copy(src, dst):
+            copies.append(src.name)
+            return real_copy(src, dst)
+
+        monkeypatch.setattr(runner, "_safe_copy_file", recording_copy)
+
+        codex_home = runner.setup_codex_home()
+        assert (codex_home / "config.toml").read_text() == 'model = "a"'
+        assert runner.setup_codex_home() == codex_home
+        assert copies.count("config.toml") == 1
+
+        config.write_text('model = "bb"')
+        st = config.stat()
+        os.utime(config, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        runner.setup_codex_home()
+        assert (codex_home / "config.toml").read_text() == 'model = "bb"'
+        runner._sync_codex_home.cache_clear()
+
+    def test_skip_sync_env_var(self, tmp_path, monkeypatch):
+        """SUBSPACE_SKIP_SYNC=1 creates the workspace directory without copying."""
+        home = tmp_path / "home"
+        (home / ".codex").mkdir(parents=True)
+        (home / ".codex" / "config.toml").write_text('model = "a"')
+        monkeypatch.setattr(Path, "home", lambda: home)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUBSPACE_SKIP_SYNC", "1")
+
+        codex_home = runner.setup_codex_home()
+        assert codex_home == tmp_path / runner.SUBAGENT_CODEX_HOME
+        assert codex_home.is_dir()
+        assert not (codex_home / "config.toml").exists()
+
+
 class TestExtractAgentMessages:
     """Tests for JSONL parsing and message extraction."""
 
@@ -120,6 +255,40 @@ class TestExtractAgentMessages:
         result = extract_agent_messages(jsonl_lines)
         assert result == "Real message"
 
+    def test_handles_spaced_json(self):
+        """Pretty-spaced JSON should still pass the substring prefilter."""
+        jsonl_lines = [
+            '{"type": "item.completed", "item": {"type": "agent_message", "text": "Spaced"}}',
+        ]
+        assert extract_agent_messages(jsonl_lines) == "Spaced"
+
+
+class TestAgentMessageExtractor:
+    """Tests for incremental message extraction."""
+
+    def test_accepts_str_and_bytes_lines(self):
+        """Lines may be fed as text or raw UTF-8 bytes."""
+        extractor = AgentMessageExtractor()
+        extractor.feed('{"type":"item.completed","item":{"type":"agent_message","text":"One"}}')
+        extractor.feed(b'{"type":"turn.completed"}')
+        extractor.feed('{"type":"item.completed","item":{"type":"agent_message","text":"Zw\u00f6"}}'.encode())
+        assert extractor.result() == "One\n\nZw\u00f6"
+
+    def test_unexpected_shapes_are_skipped(self):
+        """Events that pass the prefilter but aren't message objects are ignored."""
+        extractor = AgentMessageExtractor()
+        extractor.feed('["item.completed", "agent_message"]')
+        extractor.feed('{"type":"item.completed","item":"agent_message"}')
+        extractor.feed('{"type":"item.completed","item":{"type":"agent_message","text":["x"]}}')
+        extractor.feed('{"type":"item.started","item":{"type":"agent_message","text":"x"},"n":"item.completed"}')
+        assert extractor.result() == ""
+
+    def test_invalid_utf8_is_skipped(self):
+        """Undecodable byte lines should be ignored like malformed JSON."""
+        extractor = AgentMessageExtractor()
+        extractor.feed(b'{"type":"item.completed","item":{"type":"agent_message","text":"\xff"}}')
+        assert extractor.result() == ""
+
 
 class TestParseAgentTaskPair:
     """Tests for agent:task parsing."""
@@ -142,6 +311,12 @@ class TestParseAgentTaskPair:
         assert agent == "coder"
         assert task == "implement the feature"
 
+    def test_splits_on_first_colon(self):
+        """Later colons, and quotes that don't wrap the task, stay in the task."""
+        assert parse_agent_task_pair("coder:fix a:b") == ("coder", "fix a:b")
+        assert parse_agent_task_pair('coder:"a":b') == ("coder", '"a":b')
+        assert parse_agent_task_pair('coder:""') == ("coder", '""')
+
     def test_invalid_format_no_colon(self):
         """Missing colon should raise ValueError."""
         with pytest.raises(ValueError, match="Invalid agent:task format"):
@@ -180,6 +355,29 @@ class TestBuildPayload:
         assert "Do NOT spawn subagents" in payload["instructions"]
         assert "Custom instructions" in payload["instructions"]
 
+    def test_shared_started_at(self):
+        """An explicit started_at is used as-is."""
+        payload = build_payload("a", "x", "task", started_at="2025-01-01T00:00:00Z")
+        assert payload["metadata"]["startedAt"] == "2025-01-01T00:00:00Z"
+
+    def test_guidance_matches_format(self):
+        """Placeholder substitution is equivalent to str.format."""
+        payload = build_payload("tdd-agent", "x", "task")
+        expected = SUBAGENT_GUIDANCE.format(agent_name="tdd-agent")
+        assert payload["instructions"].startswith(expected)
+
+
+class TestEncodePayload:
+    """Tests for payload serialization."""
+
+    def test_compact_round_trip(self):
+        """Encoded payloads are compact JSON that decodes to the same dict."""
+        payload = build_payload("test-agent", "Line one\nZw\u00f6lf", "task")
+        encoded = encode_payload(payload)
+        assert isinstance(encoded, bytes)
+        assert b'", "' not in encoded
+        assert json.loads(encoded) == payload
+
 
 class TestBuildVanillaPayload:
     """Tests for vanilla payload building."""
@@ -196,3 +394,286 @@ class TestBuildVanillaPayload:
         """Vanilla payload should not have instructions field."""
         payload = build_vanilla_payload("task")
         assert "instructions" not in payload
+
+
+class TestCodexEnv:
+    """Tests for the subprocess environment."""
+
+    def test_overrides_codex_home(self, tmp_path, monkeypatch):
+        """CODEX_HOME points at the workspace copy; other variables pass through."""
+        monkeypatch.setenv("CODEX_HOME", "/elsewhere")
+        monkeypatch.setenv("SUBSPACE_TEST_VAR", "kept")
+
+        env = _codex_env(tmp_path)
+        assert env["CODEX_HOME"] == str(tmp_path)
+        assert env["SUBSPACE_TEST_VAR"] == "kept"
+
+
+class TestRunCodexSync:
+    """Tests for reading codex output in _run_codex_sync."""
+
+    def test_extracts_messages_across_read_chunks(self, tmp_path, monkeypatch):
+        """Lines split across os.read() chunks and a final unterminated line are handled."""
+        monkeypatch.setattr(runner, "STDOUT_READ_SIZE", 16)
+        jsonl = (
+            '{"type":"thread.started"}\n'
+            '{"type":"item.completed","item":{"type":"agent_message","text":"First"}}\n'
+            '{"type":"item.completed","item":{"type":"agent_message","text":"Last"}}'
+        )
+        codex = _printing_codex(tmp_path, jsonl)
+
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 30, "text", False)
+        assert result.returncode == 0
+        assert result.output == "First\n\nLast"
+
+    def test_large_stderr_does_not_block(self, tmp_path):
+        """stderr beyond the pipe buffer is drained while stdout is read."""
+        codex = _fake_codex(
+            tmp_path,
+            "cat > /dev/null\nhead -c 300000 /dev/zero >&2\n"
+            "echo '{\"type\":\"item.completed\",\"item\":{\"type\":\"agent_message\",\"text\":\"done\"}}'\n",
+        )
+
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 10, "text", False)
+        assert result.error is None
+        assert result.output == "done"
+
+    def test_timeout_applies_while_reading(self, tmp_path):
+        """A child that keeps stdout open past the timeout is killed."""
+        codex = _fake_codex(tmp_path, "cat > /dev/null\necho '{}'\nexec sleep 10\n")
+
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 1, "text", False)
+        assert result.returncode == -1
+        assert result.error == "Timeout after 1s"
+
+    def test_streams_jsonl_lines(self, tmp_path, capfdbinary):
+        """jsonl mode writes each non-empty line, stripped, to stdout."""
+        codex = _printing_codex(tmp_path, '{"a":1}\n\n  {"b":2}  \n')
+
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 30, "jsonl", False)
+        assert result.output == ""
+        assert capfdbinary.readouterr().out == b'{"a":1}\n{"b":2}\n'
+
+    def test_streams_jsonl_to_text_only_stdout(self, tmp_path, monkeypatch):
+        """A replacement stdout without a binary buffer receives decoded lines."""
+        codex = _printing_codex(tmp_path, '{"a":1}\n{"b":"é"}\n')
+        out = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", out)
+
+        _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 30, "jsonl", False)
+        assert out.getvalue() == '{"a":1}\n{"b":"é"}\n'
+
+    def test_sends_whole_large_payload(self, tmp_path):
+        """Payloads far larger than a pipe buffer reach codex intact."""
+        received = tmp_path / "received"
+        codex = _fake_codex(tmp_path, f"cat > '{received}'\n")
+        payload = build_vanilla_payload("x" * 1_000_000)
+
+        result = _run_codex_sync(payload, codex, tmp_path, 30, "text", False)
+        assert result.returncode == 0
+        assert received.read_bytes() == encode_payload(payload)
+
+    def test_communicate_fallback(self, tmp_path, monkeypatch):
+        """Without pipe selection, output and timeouts go through communicate()."""
+        monkeypatch.setattr(runner, "SELECTABLE_PIPES", False)
+        codex = _printing_codex(
+            tmp_path,
+            '{"type":"item.completed","item":{"type":"agent_message","text":"Done"}}',
+        )
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 30, "text", False)
+        assert result.returncode == 0
+        assert result.output == "Done"
+
+        codex = _fake_codex(tmp_path, "cat > /dev/null\nexec sleep 30\n")
+        result = _run_codex_sync(build_vanilla_payload("task"), codex, tmp_path, 1, "text", False)
+        assert result.returncode == -1
+        assert result.error == "Timeout after 1s"
+
+
+class TestRunCodexAsync:
+    """Tests for _run_codex_async."""
+
+    def test_timeout_covers_whole_run(self, tmp_path):
+        """Steady output must not keep extending the timeout."""
+        codex = _fake_codex(
+            tmp_path,
+            "cat > /dev/null\n"
+            "while :; do echo '{\"type\":\"turn.started\"}'; sleep 0.2; done\n",
+        )
+
+        result = asyncio.run(_run_codex_async(
+            build_vanilla_payload("task"), codex, tmp_path, 1, "text", "agent-1"
+        ))
+        assert result.returncode == -1
+        assert result.error == "Timeout after 1s"
+
+    def test_large_stderr_does_not_block(self, tmp_path):
+        """stderr beyond the pipe buffer doesn't stall the child."""
+        codex = _fake_codex(
+            tmp_path,
+            "cat > /dev/null\nhead -c 300000 /dev/zero >&2\n"
+            "echo '{\"type\":\"item.completed\",\"item\":{\"type\":\"agent_message\",\"text\":\"done\"}}'\n",
+        )
+
+        result = asyncio.run(_run_codex_async(
+            build_vanilla_payload("task"), codex, tmp_path, 10, "text", "agent-1"
+        ))
+        assert result.error is None
+        assert result.output == "done"
+
+    def test_streams_tagged_events(self, tmp_path, capsys):
+        """jsonl mode wraps each event with the agent id; other lines pass through."""
+        codex = _fake_codex(
+            tmp_path,
+            "cat > /dev/null\n"
+            "echo '{\"type\":\"turn.started\"}'\necho\necho 'not json'\nprintf '{\"n\":1}'\n",
+        )
+
+        asyncio.run(_run_codex_async(
+            build_vanilla_payload("task"), codex, tmp_path, 30, "jsonl", "codex-0"
+        ))
+        lines = capsys.readouterr().out.splitlines()
+        assert json.loads(lines[0]) == {
+            "agent_id": "codex-0", "agent_name": "codex", "event": {"type": "turn.started"}
+        }
+        assert lines[1] == "not json"
+        assert json.loads(lines[2])["event"] == {"n": 1}
+        assert len(lines) == 3
+
+    def test_accepts_lines_over_default_stream_limit(self, tmp_path):
+        """Agent messages longer than asyncio's 64 KiB default line limit are kept."""
+        text = "x" * 200_000
+        event = {"type": "item.completed", "item": {"type": "agent_message", "text": text}}
+        codex = _printing_codex(tmp_path, json.dumps(event) + "\n")
+
+        result = asyncio.run(_run_codex_async(
+            build_vanilla_payload("task"), codex, tmp_path, 30, "text", "agent-1"
+        ))
+        assert result.returncode == 0
+        assert result.output == text
+
+
+class TestRunParallelAsync:
+    """Tests for _run_parallel_async."""
+
+    def test_runs_every_agent(self, tmp_path):
+        """Each request gets a payload with its own instructions and a result."""
+        agents = []
+        for name in ("alpha", "beta"):
+            path = tmp_path / f"{name}.md"
+            path.write_text(f"---\ndescription: {name}\n---\n{name} instructions\n")
+            agents.append((name, f"task for {name}", path))
+
+        # Echo the agent name from the payload back as the agent message
+        codex = _fake_codex(
+            tmp_path,
+            "name=$(sed -n 's/.*\"agentName\":\"\\([a-z]*\\)\".*/\\1/p')\n"
+            "echo '{\"type\":\"item.completed\",\"item\":{\"type\":\"agent_message\",\"text\":\"'$name'\"}}'\n",
+        )
+
+        completed = []
+        results = asyncio.run(_run_parallel_async(
+            requests=agents,
+            codex_bin=codex,
+            codex_home=tmp_path,
+            timeout=30,
+            output_format="text",
+            on_complete=lambda result, agent_id: completed.append(agent_id),
+        ))
+
+        assert sorted(completed) == ["alpha-0", "beta-1"]
+        assert sorted(r.output for r in results) == ["alpha", "beta"]
+
+    def test_reports_in_completion_order(self, tmp_path):
+        """A later agent is reported while one submitted earlier is still running."""
+        agents = []
+        for name in ("slow", "fast"):
+            path = tmp_path / f"{name}.md"
+            path.write_text(f"{name} instructions\n")
+            agents.append((name, "task", path))
+
+        # "slow" only exits once "fast" has been reported, so reporting in
+        # submission order would stall it until the timeout
+        reported = tmp_path / "reported"
+        codex = _fake_codex(
+            tmp_path,
+            "grep -q '\"agentName\":\"slow\"' || exit 0\n"
+            f"while [ ! -e '{reported}' ]; do sleep 0.01; done\n",
+        )
+
+        def on_complete(result, agent_id):
+            completed.append((agent_id, result.returncode))
+            reported.touch()
+
+        completed = []
+        asyncio.run(_run_parallel_async(
+            requests=agents,
+            codex_bin=codex,
+            codex_home=tmp_path,
+            timeout=10,
+            output_format="text",
+            on_complete=on_complete,
+        ))
+
+        assert completed == [("fast-1", 0), ("slow-0", 0)]
+
+    def test_max_parallel_limits_concurrency(self, tmp_path):
+        """With max_parallel=1 the codex runs don't overlap."""
+        agents = []
+        for name in ("one", "two", "three"):
+            path = tmp_path / f"{name}.md"
+            path.write_text(f"{name} instructions\n")
+            agents.append((name, "task", path))
+
+        log = tmp_path / "log"
+        codex = _fake_codex(
+            tmp_path,
+            f"cat > /dev/null\necho start >> '{log}'\necho end >> '{log}'\n",
+        )
+
+        asyncio.run(_run_parallel_async(
+            requests=agents,
+            codex_bin=codex,
+            codex_home=tmp_path,
+            timeout=30,
+            output_format="text",
+            on_complete=lambda result, agent_id: None,
+            max_parallel=1,
+        ))
+
+        assert log.read_text().split() == ["start", "end"] * 3
+
+    def test_max_parallel_runs_agents_concurrently(self, tmp_path):
+        """Up to max_parallel codex runs overlap, and never more."""
+        agents = []
+        for name in ("one", "two", "three", "four"):
+            path = tmp_path / f"{name}.md"
+            path.write_text(f"{name} instructions\n")
+            agents.append((name, "task", path))
+
+        # Each run waits until a second one has started, so they can only
+        # finish if two run at once
+        log = tmp_path / "log"
+        codex = _fake_codex(
+            tmp_path,
+            f"cat > /dev/null\necho start >> '{log}'\n"
+            f"while [ $(grep -c start '{log}') -lt 2 ]; do sleep 0.01; done\n"
+            f"echo end >> '{log}'\n",
+        )
+
+        results = asyncio.run(_run_parallel_async(
+            requests=agents,
+            codex_bin=codex,
+            codex_home=tmp_path,
+            timeout=10,
+            output_format="text",
+            on_complete=lambda result, agent_id: None,
+            max_parallel=2,
+        ))
+
+        assert [r.returncode for r in results] == [0] * 4
+        running = peak = 0
+        for event in log.read_text().split():
+            running += 1 if event == "start" else -1
+            peak = max(peak, running)
+        assert peak == 2